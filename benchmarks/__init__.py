@@ -0,0 +1,19 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Benchmarks of PyMilia, run with asv'''
@@ -0,0 +1,33 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Import time of the packages, each one measured in a new process'''
+
+def timeraw_import_milia():
+    return 'import milia'
+
+def timeraw_import_pure():
+    return 'import milia.pure'
+
+def timeraw_pure_flat():
+    # a model without elliptic integrals
+    return 'import milia.pure; milia.pure.Flrw(70, 1.0, 0.0).dl(1.0)'
+
+def timeraw_pure_elliptic():
+    # a model with elliptic integrals
+    return 'import milia.pure; milia.pure.Flrw(70, 0.3, 0.7).dl(1.0)'
@@ -0,0 +1,123 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Benchmarks of the metrics, for every model and backend'''
+
+import numpy as np
+
+# Parameters (matter, vacuum) of each model selected by
+# milia.factory.FlrwNat
+MODELS = {
+    'OM_OV_0': (0.0, 0.0),   # empty
+    'OM_DS': (0.0, 1.0),     # de Sitter
+    'OM': (0.0, 0.5),
+    'OV_EDS': (1.0, 0.0),    # Einstein-de Sitter
+    'OV_1': (0.3, 0.0),
+    'OV_2': (1.5, 0.0),
+    'OM_OV_1': (0.3, 0.7),   # flat
+    'A2_1': (0.5, -0.25),    # open, crit = 2
+    'A2_2': (1.5, 0.007),    # closed
+    'A1': (0.3, 0.2),
+    }
+
+BACKENDS = ['compiled', 'pure']
+QUANTITIES = ['dl', 'dc', 'da', 'dm', 'vol', 'lt', 'age', 'dvol_dz']
+HUBBLE = 70.0
+ARRAY_SIZE = 100000
+
+def metric_class(backend):
+    '''Return the class Flrw of a backend, or skip the benchmark.'''
+    try:
+        if backend == 'compiled':
+            # milia.Flrw falls back to the pure backend
+            from milia._milia import Flrw
+        else:
+            from milia.pure import Flrw
+    except ImportError:
+        raise NotImplementedError('backend %s not available' % backend)
+    return Flrw
+
+def method(backend, model, quantity):
+    '''Return a method of a metric, or skip the benchmark.'''
+    metric = metric_class(backend)(HUBBLE, *MODELS[model])
+    fun = getattr(metric, quantity)
+    # raises NotImplementedError for the quantities missing in a model
+    fun(1.5)
+    return fun
+
+def redshifts(size=ARRAY_SIZE):
+    return np.linspace(0.001, 5, size)
+
+class TimeScalar(object):
+    '''Calls with one redshift.'''
+    params = (BACKENDS, sorted(MODELS), QUANTITIES)
+    param_names = ['backend', 'model', 'quantity']
+
+    def setup(self, backend, model, quantity):
+        self.fun = method(backend, model, quantity)
+
+    def time_call(self, backend, model, quantity):
+        self.fun(1.5)
+
+class TimeArray(object):
+    '''Calls with an array of redshifts.'''
+    params = (BACKENDS, sorted(MODELS), QUANTITIES)
+    param_names = ['backend', 'model', 'quantity']
+
+    def setup(self, backend, model, quantity):
+        self.fun = method(backend, model, quantity)
+        self.z = redshifts()
+
+    def time_call(self, backend, model, quantity):
+        self.fun(self.z)
+
+class TimeEvaluate(object):
+    '''All the distances and the volume in one call.'''
+    params = (BACKENDS, sorted(MODELS))
+    param_names = ['backend', 'model']
+
+    def setup(self, backend, model):
+        self.metric = metric_class(backend)(HUBBLE, *MODELS[model])
+        self.z = redshifts()
+
+    def time_evaluate(self, backend, model):
+        self.metric.evaluate(self.z, ('dl', 'dc', 'da', 'dm', 'vol'))
+
+class TimeConstruction(object):
+    '''Construction of the metric.'''
+    params = (BACKENDS, sorted(MODELS))
+    param_names = ['backend', 'model']
+
+    def setup(self, backend, model):
+        self.cls = metric_class(backend)
+        self.args = (HUBBLE,) + MODELS[model]
+
+    def time_construction(self, backend, model):
+        self.cls(*self.args)
+
+class PeakMemArray(object):
+    '''Peak memory of calls with an array of redshifts.'''
+    params = (BACKENDS, sorted(MODELS), ['dl', 'vol'])
+    param_names = ['backend', 'model', 'quantity']
+
+    def setup(self, backend, model, quantity):
+        self.fun = method(backend, model, quantity)
+        self.z = redshifts(10 * ARRAY_SIZE)
+
+    def peakmem_call(self, backend, model, quantity):
+        self.fun(self.z)
@@ -16,9 +16,128 @@
 # along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-'''The milia package'''
+'''The milia package
 
-from ._milia import FlrwNat
-from ._milia import Flrw
+The classes Flrw, FlrwNat and Metric of the package come from the
+active backend, selected with set_backend. By default, the compiled
+extension is used if it is available, and the pure implementation
+otherwise.
+'''
 
-Metric = Flrw
+from contextlib import contextmanager
+
+# Backends in order of preference
+BACKENDS = ('cython', 'pure')
+# 'numpy' is another name of the pure implementation, vectorized with numpy
+_ALIASES = {'numpy': 'pure'}
+
+_CAPABILITIES = {
+    'cython': {'nogil': True, 'vectorized': True, 'tabulated': True, 
+               'threads': True, 'ensemble': True},
+    'pure': {'nogil': False, 'vectorized': True, 'tabulated': True,
+             'threads': False, 'ensemble': False},
+    }
+
+_EXPORTED = ('Flrw', 'FlrwNat', 'FlrwEnsemble', 'Metric')
+
+_classes = {}
+_active = None
+
+def _load(name):
+    '''Return the classes of a backend, raise ImportError if it is missing.'''
+    if name not in _classes:
+        if name == 'cython':
+            from . import _milia
+            classes = {'Flrw': _milia.Flrw, 'FlrwNat': _milia.FlrwNat,
+                       'FlrwEnsemble': _milia.FlrwEnsemble}
+        else:
+            from . import pure, factory
+            classes = {'Flrw': pure.Flrw, 'FlrwNat': factory.FlrwNat}
+        classes['Metric'] = classes['Flrw']
+        _classes[name] = classes
+    return _classes[name]
+
+def available_backends():
+    '''Return the names of the backends that can be used.'''
+    res = []
+    for name in BACKENDS:
+        try:
+            _load(name)
+            res.append(name)
+        except ImportError:
+            pass
+    return res
+
+def set_backend(name='auto'):
+    '''Select the implementation of Flrw, FlrwNat and Metric.
+
+    :param name: 'cython', 'numpy' or 'pure' (the same implementation), 
+                 or 'auto', the fastest available
+    :returns: the name of the backend selected
+    :raises: ImportError if the backend is not available
+
+    '''
+    global _active
+    name = _ALIASES.get(name, name)
+    if name == 'auto':
+        for candidate in BACKENDS:
+            try:
+                _load(candidate)
+            except ImportError:
+                continue
+            _active = candidate
+            return _active
+        raise ImportError('no backend of milia is available')
+    if name not in BACKENDS:
+        raise ValueError('unknown backend %r' % name)
+    _load(name)
+    _active = name
+    return _active
+
+def get_backend():
+    '''Return the name of the active backend.'''
+    if _active is None:
+        set_backend('auto')
+    return _active
+
+def capabilities():
+    '''Return the active backend and its capabilities.
+
+    :returns: a dictionary with the name of the backend in 'backend' and
+              a flag for each capability: 'nogil' (releases the GIL),
+              'vectorized' (evaluates arrays), 'tabulated' (interpolation
+              tables, interpolated with NumPy, holding the GIL), 'threads' 
+              (parallel evaluation) and 'ensemble' (FlrwEnsemble)
+
+    '''
+    name = get_backend()
+    res = {'backend': name}
+    res.update(_CAPABILITIES[name])
+    return res
+
+@contextmanager
+def backend(name):
+    '''Use a backend inside a with block.
+
+    :param name: name of the backend, as in set_backend
+
+    '''
+    previous = get_backend()
+    set_backend(name)
+    try:
+        yield get_backend()
+    finally:
+        set_backend(previous)
+
+def __getattr__(name):
+    if name in _EXPORTED:
+        classes = _load(get_backend())
+        try:
+            return classes[name]
+        except KeyError:
+            raise AttributeError('%s is not available in the backend %r' % 
+                                 (name, _active))
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTED))
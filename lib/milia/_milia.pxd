@@ -0,0 +1,116 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+# Declarations of milia._milia, for the extensions that cimport it.
+#
+#     from milia._milia cimport Flrw, DL
+#
+#     cdef Flrw metric = Flrw(70, 0.3, 0.7)
+#     with nogil:
+#         dl = metric.value(DL, z)
+#
+# value can raise an exception, it takes the GIL to compute the series
+# of the distances the first time they are needed.
+#
+# flrw_eval and flrw_nat_eval evaluate the C++ metrics given by
+# the handle attribute of Flrw and FlrwNat, they are also exported in
+# the PyCapsules of milia._milia.__pyx_capi__, and their addresses 
+# are returned by milia._milia.c_api().
+
+from libcpp.vector cimport vector
+
+cdef extern from "milia/flrw_nat.h" namespace "milia" nogil:
+    cdef cppclass flrw_nat:
+        flrw_nat(double, double) except+
+        double dc(double)
+        double dm(double)
+        double da(double)
+        double dl(double)
+        double lt(double)
+        double vol(double)
+        double age()
+        double age(double)
+        double get_matter()
+        double set_matter(double)
+        double get_vacuum()
+        double set_vacuum(double)
+
+cdef extern from "milia/flrw.h" namespace "milia" nogil:
+    cdef cppclass flrw:
+        flrw(double, double, double) except+
+        double dc(double)
+        double dm(double)
+        double da(double)
+        double dl(double)
+        double lt(double)
+        double vol(double)
+        double age()
+        double age(double)
+        double angular_scale(double)
+        double get_hubble()
+        double set_hubble(double)
+
+# Quantities computed by the metrics, used to dispatch
+# the evaluation of arrays of redshifts
+cdef enum quantity:
+    DC, DM, DA, DL, LT, VOL, AGE, ANGSCALE, HUBBLE, DDC, DVOL
+
+# Series expansions of the comoving distance, in natural units,
+# see milia.impl.distance_series; the coefficients are in the
+# order of Horner's method, high is used only if zhigh is finite;
+# active is False until they are computed from the parameters, and
+# dc_inf is NaN until it is needed
+cdef enum:
+    SERIES_ORDER = 32
+
+cdef struct series:
+    bint active
+    double ok
+    double zlow
+    double zhigh
+    double dc_inf
+    double low[SERIES_ORDER]
+    double high[SERIES_ORDER]
+
+cdef double flrw_eval(void *handle, int q, double z) noexcept nogil
+cdef double flrw_nat_eval(void *handle, int q, double z) noexcept nogil
+
+cdef class _FlrwBase:
+    cdef series _series
+    cdef _prepare(self, int q, object z, bint scalar)
+    cdef double _eval(self, int q, double z) noexcept nogil
+    cdef double _radius(self)
+    cdef void _evaluate(self, double z, double ok, double radius, bint need_dl,
+            const int[::1] qv, double[:, ::1] rv, Py_ssize_t i) noexcept nogil
+    cdef object _map(self, int q, object z, object num_threads, 
+            object out=*, object dtype=*)
+    cdef double value(self, int q, double z) except? -1 nogil
+
+cdef class FlrwNat(_FlrwBase):
+    cdef flrw_nat *thisptr
+
+cdef class Flrw(_FlrwBase):
+    cdef flrw *thisptr
+
+cdef class FlrwEnsemble:
+    cdef vector[flrw *] metrics
+    cdef readonly object hubble
+    cdef readonly object matter
+    cdef readonly object vacuum
+    cdef object _map(self, int q, object z, object num_threads)
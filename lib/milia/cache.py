@@ -0,0 +1,259 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''Persistent cache of interpolation tables
+
+The tables of milia.tabulate are stored in a directory, one file for
+each metric, range and tolerance, named by a hash of them. The files
+are opened with numpy.memmap, the processes that use the same table
+share one copy in memory. The least recently used files are removed
+when the directory grows beyond its maximum size.
+
+The format of the files is a header and the data::
+
+    magic     8 bytes, MILIATAB
+    version   uint32, little endian
+    length    uint32, little endian, length of the metadata
+    metadata  JSON, padded with spaces to a multiple of 8 bytes
+    data      float64, little endian, the nodes in log(1 + z) in the
+              first row, then 4 rows of coefficients of each column
+'''
+
+from __future__ import division
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from milia.tabulate import FlrwTable, metric_parameters
+
+# Version of the format, files of other versions are not used
+FORMAT_VERSION = 1
+# Default maximum size of the directory, in bytes
+MAX_SIZE = 256 * 1024 * 1024
+
+_MAGIC = b'MILIATAB'
+_HEADER = struct.Struct('<8sII')
+_SUFFIX = '.tab'
+
+def default_directory():
+    '''Return the directory of the cache, $MILIA_CACHE_DIR or ~/.cache/milia.'''
+    directory = os.environ.get('MILIA_CACHE_DIR')
+    if directory is None:
+        base = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+        directory = os.path.join(base, 'milia')
+    return directory
+
+def _parameters(metric):
+    matter, vacuum, _, _ = metric_parameters(metric)
+    hubble = getattr(metric, 'hubble', None)
+    if hubble is not None:
+        hubble = float(hubble)
+    return hubble, float(matter), float(vacuum)
+
+def table_key(metric, zmin, zmax, rtol):
+    '''Return the key of a table, a hash of the parameters and the version.'''
+    hubble, matter, vacuum = _parameters(metric)
+    values = [FORMAT_VERSION, 'nat' if hubble is None else hubble.hex(),
+              matter.hex(), vacuum.hex(), float(zmin).hex(), float(zmax).hex(),
+              float(rtol).hex()]
+    return hashlib.sha256(repr(values).encode('ascii')).hexdigest()
+
+def _write(path, table):
+    hubble, matter, vacuum = _parameters(table.metric)
+    meta = {'hubble': hubble, 'matter': matter, 'vacuum': vacuum,
+            'zmin': table.zmin, 'zmax': table.zmax, 'rtol': table.rtol,
+            'columns': table.columns, 'nodes': len(table._x),
+            'max_rel_error': table.max_rel_error}
+    text = json.dumps(meta).encode('ascii')
+    text += b' ' * (-len(text) % 8)
+    data = np.zeros((1 + 4 * len(table.columns), len(table._x)), dtype='<f8')
+    data[0] = table._x
+    for k, q in enumerate(table.columns):
+        data[1 + 4 * k:5 + 4 * k, :-1] = table._coef[q]
+    # written in a temporary file and renamed, the readers
+    # never see a partial file
+    fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as fobj:
+            fobj.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, len(text)))
+            fobj.write(text)
+            fobj.write(data.tobytes())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _read(path, metric):
+    with open(path, 'rb') as fobj:
+        header = fobj.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError('%s is truncated' % path)
+        magic, version, length = _HEADER.unpack(header)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ValueError('%s is not a table of version %d' % (path, FORMAT_VERSION))
+        meta = json.loads(fobj.read(length).decode('ascii'))
+    columns = meta['columns']
+    data = np.memmap(path, dtype='<f8', mode='r', offset=_HEADER.size + length,
+                     shape=(1 + 4 * len(columns), meta['nodes']))
+    coef = [data[1 + 4 * k:5 + 4 * k, :-1] for k in range(len(columns))]
+    return FlrwTable.from_arrays(metric, meta['zmin'], meta['zmax'], meta['rtol'],
+                                 columns, data[0], coef, meta['max_rel_error'])
+
+class TableCache(object):
+    '''A directory of interpolation tables.
+
+    The tables are read with numpy.memmap, and computed and stored
+    when they are not in the directory.
+    '''
+    def __init__(self, directory=None, max_size=MAX_SIZE):
+        '''The constructor takes two parameters:
+
+        :param directory: directory of the files, by default the 
+                          result of default_directory()
+        :param max_size: maximum size of the directory in bytes, 
+                         None for no limit
+
+        '''
+        if directory is None:
+            directory = default_directory()
+        self.directory = directory
+        self.max_size = max_size
+
+    def path(self, metric, zmin, zmax, rtol=1e-8):
+        '''Return the path of the file of a table.'''
+        return os.path.join(self.directory, table_key(metric, zmin, zmax, rtol) + _SUFFIX)
+
+    def get(self, metric, zmin, zmax, rtol=1e-8):
+        '''Return the interpolation table of a metric.
+
+        :param metric: the exact metric, of any backend
+        :param zmin: lower redshift of the table
+        :param zmax: upper redshift of the table
+        :param rtol: relative tolerance of the interpolation
+        :returns: a FlrwTable, memory-mapped
+
+        '''
+        path = self.path(metric, zmin, zmax, rtol)
+        try:
+            table = _read(path, metric)
+        except (OSError, ValueError):
+            table = None
+        if table is not None:
+            # the modification time records the last use
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return table
+        table = FlrwTable(metric, zmin, zmax, rtol)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write(path, table)
+        except OSError:
+            # a read-only cache, the table is not stored
+            return table
+        self.evict(keep=path)
+        return _read(path, metric)
+
+    def files(self):
+        '''Return the paths of the tables, the least recently used first.'''
+        try:
+            names = [name for name in os.listdir(self.directory) 
+                     if name.endswith(_SUFFIX)]
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                pass
+        return [path for _, path in sorted(entries)]
+
+    def size(self):
+        '''Return the total size of the tables, in bytes.'''
+        total = 0
+        for path in self.files():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def evict(self, keep=None):
+        '''Remove the least recently used tables, until the size of the
+        directory is below the maximum.
+
+        :param keep: path of a table that is not removed
+
+        '''
+        if self.max_size is None:
+            return
+        files = self.files()
+        sizes = {}
+        for path in files:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError:
+                sizes[path] = 0
+        total = sum(sizes.values())
+        for path in files:
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                # the tables mapped by other processes remain valid
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= sizes[path]
+
+    def clear(self):
+        '''Remove all the tables.'''
+        for path in self.files():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def __str__(self):
+        return 'milia.TableCache(%r, max_size=%s)' % (self.directory, self.max_size)
+
+def cached_table(metric, zmin, zmax, rtol=1e-8, cache=None):
+    '''Return the interpolation table of a metric, through a cache.
+
+    :param metric: the exact metric, of any backend
+    :param zmin: lower redshift of the table
+    :param zmax: upper redshift of the table
+    :param rtol: relative tolerance of the interpolation
+    :param cache: a TableCache, or a directory, by default the 
+                  default directory
+    :returns: a FlrwTable, memory-mapped
+
+    '''
+    if not isinstance(cache, TableCache):
+        cache = TableCache(cache)
+    return cache.get(metric, zmin, zmax, rtol)
@@ -20,9 +20,11 @@
 
 from __future__ import division
 
-from flatmodels import Flrw_OV_EDS, Flrw_OM_DS, Flrw_OM_OV_1
-from nonflatmodels import Flrw_OM_OV_0, Flrw_OM, Flrw_OV_1, Flrw_OV_2
-from nonflatmodels import FlrwA1, FlrwA2_1, FlrwA2_2
+import numpy as np
+
+from .flatmodels import Flrw_OV_EDS, Flrw_OM_DS, Flrw_OM_OV_1
+from .nonflatmodels import Flrw_OM_OV_0, Flrw_OM, Flrw_OV_1, Flrw_OV_2
+from .nonflatmodels import FlrwA1, FlrwA2_1, FlrwA2_2, FlrwNonFlat
 
 # Factory function
 def FlrwNat(matter, vacuum):
@@ -51,9 +53,86 @@ def FlrwNat(matter, vacuum):
     if crit == 2:
         return FlrwA2_1(matter, vacuum)
     elif 0 < crit < 2:
-        return FlrwA2_2(matter, vacuum)
+        return FlrwA2_2(matter, vacuum, crit)
     elif crit > 2 or crit < 0:
-        return FlrwA1(matter, vacuum)
+        return FlrwA1(matter, vacuum, crit)
 
     return FlrwNonFlat(matter, vacuum)
 
+
+# Models selected by FlrwNat, in the order of the tests
+BRANCHES = (Flrw_OM_OV_0, Flrw_OM_DS, Flrw_OM, Flrw_OV_EDS, Flrw_OV_1, 
+            Flrw_OV_2, Flrw_OM_OV_1, FlrwA2_1, FlrwA2_2, FlrwA1, FlrwNonFlat)
+
+def classify(matter, vacuum):
+    '''Return the model used by FlrwNat for arrays of parameters.
+
+    :param matter: mater densities (adimensional), array-like
+    :param vacuum: vacuum energy densities (adimensional), array-like
+    :returns: indices in BRANCHES, with the broadcast shape of the parameters
+
+    '''
+    matter, vacuum = np.broadcast_arrays(np.asarray(matter, dtype='float'), 
+                                         np.asarray(vacuum, dtype='float'))
+    ok = 1 - matter - vacuum
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crit = -13.5 * matter**2 * vacuum / ok**3
+
+    conditions = [(matter == 0) & (vacuum == 0),
+                  (matter == 0) & (vacuum == 1),
+                  (matter == 0) & (0 < vacuum) & (vacuum < 1),
+                  (matter == 1) & (vacuum == 0),
+                  (matter < 1) & (vacuum == 0),
+                  (matter > 1) & (vacuum == 0),
+                  matter + vacuum == 1,
+                  crit == 2,
+                  (0 < crit) & (crit < 2),
+                  (crit > 2) | (crit < 0)]
+    return np.select(conditions, range(len(conditions)), len(conditions))
+
+def _build(branch, matter, vacuum):
+    '''Build the model of a branch, with arrays of parameters.'''
+    cls = BRANCHES[branch]
+    if cls in (Flrw_OM_OV_0, Flrw_OM_DS, Flrw_OV_EDS):
+        return cls()
+    elif cls is Flrw_OM:
+        return cls(vacuum)
+    elif cls in (Flrw_OV_1, Flrw_OV_2, Flrw_OM_OV_1):
+        return cls(matter)
+    elif cls in (FlrwA2_1, FlrwNonFlat):
+        return cls(matter, vacuum)
+    ok = 1 - matter - vacuum
+    crit = -13.5 * matter**2 * vacuum / ok**3
+    return cls(matter, vacuum, crit)
+
+def evaluate(matter, vacuum, quantity, z):
+    '''Evaluate a quantity for arrays of parameters, in natural units.
+
+    The parameters are grouped by model, each model is built once 
+    with the arrays of parameters of its group and evaluated for all 
+    of them at once.
+
+    :param matter: mater densities (adimensional), array-like
+    :param vacuum: vacuum energy densities (adimensional), array-like
+    :param quantity: name of the method to evaluate
+    :param z: redshift, scalar or array-like
+    :returns: array with one row per pair of parameters
+
+    '''
+    if quantity not in ('dc', 'dm', 'da', 'dl', 'lt', 'vol', 'age'):
+        raise ValueError('unknown quantity %r' % quantity)
+    matter, vacuum = np.broadcast_arrays(np.asarray(matter, dtype='float'), 
+                                         np.asarray(vacuum, dtype='float'))
+    matter = matter.flatten()
+    vacuum = vacuum.flatten()
+    z = np.asarray(z, dtype='float')
+    # the sign of the curvature must be the same in each group
+    key = 2 * classify(matter, vacuum) + (1 - matter - vacuum > 0)
+    res = np.empty(matter.shape + z.shape)
+    shape = (-1,) + (1,) * z.ndim
+    for k in np.unique(key):
+        idx = np.nonzero(key == k)[0]
+        model = _build(k // 2, matter[idx].reshape(shape), 
+                       vacuum[idx].reshape(shape))
+        res[idx] = getattr(model, quantity)(z)
+    return res
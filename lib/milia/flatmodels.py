@@ -21,14 +21,19 @@
 from __future__ import division
 
 import math
-from math import sqrt
-from scipy.special import cbrt, ellipkinc
 
-from impl import FlrwBaseImpl
+import numpy as np
+
+from .impl import FlrwBaseImpl, ellipf_acos
 
 M_SQRT3 = math.sqrt(3)
 
+# Every quantity that does not depend on the redshift is computed
+# in the constructor
+
 class FlrwFlat(FlrwBaseImpl):
+    __slots__ = ()
+
     def __init__(self, matter, vacuum):
         super(FlrwFlat, self).__init__(matter, vacuum)
 
@@ -36,20 +41,32 @@ class FlrwFlat(FlrwBaseImpl):
         return self.dm(z)
 
     def vol(self, z):
-        dm = self.dm(z)
+        return self._vol(self.dm(z), None)
+
+    def _dc(self, dm):
+        return dm
+
+    def _dm(self, dc):
+        return dc
+
+    def _vol(self, dm, dc):
         return dm * dm * dm / 3
 
 class Flrw_OV_EDS(FlrwFlat):
+    __slots__ = ()
+
     def __init__(self):
         super(Flrw_OV_EDS, self).__init__(1.0, 0.0)
 
-    def dl(self, z):
-        return 2 * (1 + z - math.sqrt(1 + z))
+    def _dl(self, z):
+        return 2 * (1 + z - np.sqrt(1 + z))
     
     def age(self, z):
-        return 2 / (3 * (1 + z) * math.sqrt(1 + z))
+        return 2 / (3 * (1 + z) * np.sqrt(1 + z))
 
 class Flrw_OM_DS(FlrwFlat):
+    __slots__ = ()
+
     def __init__(self):
         super(Flrw_OM_DS, self).__init__(0.0, 1.0)
 
@@ -58,24 +75,33 @@ class Flrw_OM_DS(FlrwFlat):
 
     # Age is not defined in this model (since there is no BB)
     # But lookback time is
+    def age(self, z=None):
+        raise NotImplementedError
+
     def lt(self, z):
-        return math.log(1 + z)
+        return np.log1p(z)
 
 class Flrw_OM_OV_1(FlrwFlat): # OM_OV_1
+    __slots__ = ('k', 'arg0', 'factor', 'down', 'up', 'delta', 'ell0', 
+                 'age_arg', 'age_factor')
+
     def __init__(self, matter):
         super(Flrw_OM_OV_1, self).__init__(matter, 1 - matter)
         self.k = 0.5 + 0.25 * M_SQRT3
-        self.arg0 = cbrt(1 / self.om - 1)
-        self.factor = math.sqrt(M_SQRT3 * self.om * self.arg0)
+        self.arg0 = np.cbrt(1 / self.om - 1)
+        self.factor = 1 / np.sqrt(M_SQRT3 * self.om * self.arg0)
         self.down = 1 + (1 + M_SQRT3) * self.arg0
         self.up = 1 + (1 - M_SQRT3) * self.arg0
-        self.phi0 = math.acos(self.up / self.down)
+        # the amplitude of the elliptic integral is arccos((z + up) / (z + down))
+        self.delta = 2 * M_SQRT3 * self.arg0
+        self.ell0 = ellipf_acos(self.up / self.down, self.delta / self.down, self.k)
+        self.age_arg = 1 / self.om - 1
+        self.age_factor = 2. / (3. * np.sqrt(self.ov))
 
-    def dl(self, z):
-        phi = math.acos((z + self.up) / (z + self.down))
-        return (1 + z) / self.factor * (ellipkinc(self.phi0, self.k) - ellipkinc(phi, self.k))
+    def _dl(self, z):
+        ell = ellipf_acos((z + self.up) / (z + self.down), self.delta / (z + self.down), self.k)
+        return (1 + z) * self.factor * (self.ell0 - ell)
 
     def age(self, z):
-        return 2. / (3. * math.sqrt(self.ov)) * math.asinh(sqrt((1 / self.om - 1) / (1 + z)**3))
-
-
+        a = 1 + z
+        return self.age_factor * np.arcsinh(np.sqrt(self.age_arg / (a * a * a)))
@@ -20,14 +20,331 @@
 
 from __future__ import division
 
+import functools
 import math
 
+import numpy as np
+
+# Quantities computed by evaluate by default
+QUANTITIES = ('dc', 'dm', 'da', 'dl', 'vol', 'lt')
+
+# Carlson R_F
+# The error of the series is below _RF_TOL
+_RF_TOL = 1e-16
+_RF_FACTOR = (3 * _RF_TOL) ** (-1 / 6)
+_RF_MAX_ITER = 40
+
+def carlson_rf(x, y, z):
+    '''Carlson symmetric elliptic integral of the first kind, R_F(x, y, z).
+
+    The integral is computed with the duplication theorem, iterating
+    over all the elements of the arrays at once. The arguments must be
+    non negative, and at most one of them zero.
+
+    :param x: first argument, array-like
+    :param y: second argument, array-like
+    :param z: third argument, array-like
+    :returns: R_F(x, y, z)
+
+    '''
+    if np.ndim(x) == 0 and np.ndim(y) == 0 and np.ndim(z) == 0:
+        return _carlson_rf_scalar(float(x), float(y), float(z))
+    x, y, z = np.broadcast_arrays(np.asarray(x, dtype='float'),
+                                  np.asarray(y, dtype='float'),
+                                  np.asarray(z, dtype='float'))
+    a0 = (x + y + z) / 3
+    dx = a0 - x
+    dy = a0 - y
+    q = _RF_FACTOR * np.maximum(np.maximum(np.abs(dx), np.abs(dy)), np.abs(a0 - z))
+    x = x.copy()
+    y = y.copy()
+    z = z.copy()
+    a = a0.copy()
+    scale = np.ones_like(a0)
+    sx = np.empty_like(a0)
+    sy = np.empty_like(a0)
+    lam = np.empty_like(a0)
+    for _ in range(_RF_MAX_ITER):
+        # each element stops when converged, so that the result does
+        # not depend on the other elements. NaN are not iterated
+        active = q * scale >= np.abs(a)
+        if not active.any():
+            break
+        np.sqrt(x, out=sx)
+        np.sqrt(y, out=sy)
+        np.sqrt(z, out=lam)
+        # lam = sx * (sy + sz) + sy * sz
+        sx *= sy + lam
+        lam *= sy
+        lam += sx
+        lam *= active
+        factor = np.where(active, 0.25, 1.0)
+        for v in (x, y, z, a):
+            v += lam
+            v *= factor
+        scale *= factor
+    xs = dx * scale / a
+    ys = dy * scale / a
+    zs = -(xs + ys)
+    e2 = xs * ys - zs * zs
+    e3 = xs * ys * zs
+    return (1 - e2 / 10 + e3 / 14 + e2 * e2 / 24 - 3 * e2 * e3 / 44) / np.sqrt(a)
+
+def _carlson_rf_scalar(x, y, z):
+    '''R_F for scalars, with the same operations as carlson_rf.'''
+    if not (x >= 0 and y >= 0 and z >= 0):
+        return float('nan')
+    a = a0 = (x + y + z) / 3
+    dx = a0 - x
+    dy = a0 - y
+    q = _RF_FACTOR * max(abs(dx), abs(dy), abs(a0 - z))
+    scale = 1.0
+    for _ in range(_RF_MAX_ITER):
+        if not q * scale >= abs(a):
+            break
+        sx = math.sqrt(x)
+        sy = math.sqrt(y)
+        sz = math.sqrt(z)
+        lam = sx * (sy + sz) + sy * sz
+        x = (x + lam) * 0.25
+        y = (y + lam) * 0.25
+        z = (z + lam) * 0.25
+        a = (a + lam) * 0.25
+        scale *= 0.25
+    xs = dx * scale / a
+    ys = dy * scale / a
+    zs = -(xs + ys)
+    e2 = xs * ys - zs * zs
+    e3 = xs * ys * zs
+    return (1 - e2 / 10 + e3 / 14 + e2 * e2 / 24 - 3 * e2 * e3 / 44) / math.sqrt(a)
+
+def ellipk(m):
+    '''Complete elliptic integral of the first kind, K(m).'''
+    return carlson_rf(0.0, 1 - m, 1.0)
+
+def ellipf(s2, c2, m):
+    '''Incomplete elliptic integral of the first kind, F(phi|m).
+
+    The amplitude phi, in [0, pi/2], is given by its squared sine and 
+    cosine, that the models compute without cancellation.
+    '''
+    return np.sqrt(s2) * carlson_rf(c2, 1 - m * s2, 1.0)
+
+def ellipf_acos(c, omc, m):
+    '''Incomplete elliptic integral of the first kind, F(arccos(c)|m).
+
+    The amplitude arccos(c) is in [0, pi], c and 1 - c are given 
+    separately, to keep the precision when c is close to 1.
+    '''
+    f = ellipf(omc * (1 + c), c * c, m)
+    # F(pi - phi|m) = 2 K(m) - F(phi|m)
+    neg = c < 0
+    if np.any(neg):
+        return np.where(neg, 2 * ellipk(m) - f, f)
+    return f
+
+# Gauss-Legendre quadrature
+# The orders of the rules are powers of 2, between these limits
+_MIN_ORDER = 8
+_MAX_ORDER = 512
+# Number of integrals computed together, bounds the size of the 
+# temporary arrays
+_CHUNK_SIZE = 4096
+
+_gauss_rules = {}
+
+def gauss_legendre(order):
+    '''Return the nodes and weights of a Gauss-Legendre rule in [0, 1].
+
+    The rules are computed once, and cached.
+    '''
+    try:
+        return _gauss_rules[order]
+    except KeyError:
+        x, w = np.polynomial.legendre.leggauss(order)
+        rule = (0.5 * (x + 1), 0.5 * w)
+        _gauss_rules[order] = rule
+        return rule
+
+def _fixed_quad(fun, lo, hi, order):
+    t, w = gauss_legendre(order)
+    width = hi - lo
+    return width * np.dot(fun(lo[..., np.newaxis] + width[..., np.newaxis] * t), w)
+
+def quadrature_order(fun, rtol, lo=0.0, hi=1.0):
+    '''Return the order of the rule that integrates fun in [lo, hi] within rtol.
+
+    The error of each rule is estimated comparing it with the rule 
+    of double order. Shorter intervals are integrated with a smaller error.
+    '''
+    lo = np.full(1, lo, dtype='float')
+    hi = np.full(1, hi, dtype='float')
+    order = _MIN_ORDER
+    prev = _fixed_quad(fun, lo, hi, order)
+    while order < _MAX_ORDER:
+        cur = _fixed_quad(fun, lo, hi, 2 * order)
+        with np.errstate(invalid='ignore'):
+            good = (np.abs(cur - prev) <= rtol * np.abs(cur)) | ~np.isfinite(cur)
+        if good.all():
+            break
+        order *= 2
+        prev = cur
+    return order
+
+def integrate(fun, lo, hi, rtol=1e-10):
+    '''Integrate a vectorized function, for arrays of limits in [0, 1].
+
+    The order of the Gauss-Legendre rule is selected to reach the 
+    requested relative tolerance. fun is called with an array whose 
+    last axis runs over the nodes of the rule.
+
+    :param fun: the integrand
+    :param lo: lower limits, array-like
+    :param hi: upper limits, array-like
+    :param rtol: relative tolerance
+    :returns: the integrals, with the shape of the limits
+
+    '''
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype='float'), 
+                                 np.asarray(hi, dtype='float'))
+    if lo.size > 0:
+        # the rule is selected in the smallest interval containing all
+        order = quadrature_order(fun, rtol, lo.min(), hi.max())
+    else:
+        order = _MIN_ORDER
+    shape = lo.shape
+    lo = lo.reshape(-1)
+    hi = hi.reshape(-1)
+    parts = [_fixed_quad(fun, lo[i:i + _CHUNK_SIZE], hi[i:i + _CHUNK_SIZE], order)
+             for i in range(0, max(lo.size, 1), _CHUNK_SIZE)]
+    res = np.concatenate(parts, axis=-1)
+    return res.reshape(res.shape[:-1] + shape)
+
+def _nodes(param):
+    '''Add an axis to an array parameter, for the nodes of the quadrature.'''
+    if np.ndim(param) == 0:
+        return param
+    return np.asarray(param)[..., np.newaxis]
+
+# Below this value of |ok * dm**2| the comoving volume is
+# computed with volume_series
+VOLUME_SERIES_LIMIT = 1e-3
+
+def volume_series(x, u):
+    '''Series of the comoving volume in u = ok * x**2, natural units.
+
+    The closed form loses precision by cancellation when u is small.
+
+    :param x: transverse comoving distance
+    :param u: ok * x**2
+    :returns: comoving volume per solid angle
+
+    '''
+    return x * x * x * (1 / 3 + u * (-1 / 10 + u * (3 / 56 + u * (-5 / 144 + u * 35 / 1408))))
+
+# Series expansions of the comoving distance
+# Number of terms of the series
+SERIES_ORDER = 32
+# The series are used where their first omitted term is below 
+# this fraction of the sum
+_SERIES_TOL = 2.0 ** -55
+
+def inverse_sqrt_series(g, order=SERIES_ORDER):
+    '''Return the Taylor coefficients of 1 / sqrt(g(x)).
+
+    :param g: coefficients of the polynomial g, with g[0] = 1
+    :param order: number of coefficients
+    :returns: array with the coefficients, the constant term first
+
+    '''
+    g = [float(c) for c in g]
+    terms = range(1, len(g))
+    f = [1.0]
+    for n in range(1, order):
+        acc = 0.0
+        for k in terms:
+            if k > n:
+                break
+            acc -= (n - 0.5 * k) * g[k] * f[n - k]
+        f.append(acc / n)
+    return np.array(f)
+
+def series_limit(coef):
+    '''Return the largest x where a power series is exact in double precision.
+
+    The first omitted term is estimated from the last terms.
+    '''
+    order = len(coef)
+    limit = np.inf
+    for n in range(order - 4, order):
+        if coef[n] != 0:
+            limit = min(limit, (_SERIES_TOL / abs(coef[n])) ** (1 / n))
+    return limit
+
+@functools.lru_cache(maxsize=256)
+def distance_series(matter, vacuum, order=SERIES_ORDER):
+    '''Return series expansions of the comoving distance, natural units.
+
+    At low redshift, dc = z * sum(low[n] * z**n) for abs(z) <= zlow.
+    At high redshift, dc = dcinf - sqrt(v) * sum(high[n] * v**n), 
+    with v = 1 / (1 + z), for z >= zhigh, where dcinf is given by
+    infinite_distance. There is no expansion at high redshift (high is 
+    None and zhigh is inf) without matter, or if there is no big bang.
+
+    :param matter: mater density (adimensional)
+    :param vacuum: vacuum energy density (adimensional)
+    :param order: number of terms of the series
+    :returns: a tuple (zlow, low, zhigh, high), the arrays are read-only
+
+    '''
+    ok = 1 - matter - vacuum
+    # E(z)**2 = 1 + (3 om + 2 ok) z + (3 om + ok) z**2 + om z**3
+    low = inverse_sqrt_series((1.0, 3 * matter + 2 * ok, 3 * matter + ok, matter), 
+                              order)
+    zlow = series_limit(low)
+    low = low / np.arange(1, order + 1)
+    zhigh, high = np.inf, None
+    if matter > 0:
+        # E(z)**2 / (1 + z)**3 = om + ok v + ov v**3, it is 1 at v = 1
+        # and it can vanish in (0, 1) only at its minimum 
+        bounce = False
+        if vacuum > 0 and ok < 0:
+            vmin = math.sqrt(-ok / (3 * vacuum))
+            bounce = vmin < 1 and matter + vmin * (ok + vacuum * vmin * vmin) <= 0
+        if not bounce:
+            high = inverse_sqrt_series((1.0, ok / matter, 0.0, vacuum / matter), 
+                                       order)
+            vhigh = series_limit(high)
+            zhigh = max(1 / vhigh - 1, 0.0)
+            high = 2 / math.sqrt(matter) * high / np.arange(1, 2 * order, 2)
+            high.flags.writeable = False
+    low.flags.writeable = False
+    return zlow, low, zhigh, high
+
+@functools.lru_cache(maxsize=256)
+def infinite_distance(matter, vacuum):
+    '''Return the comoving distance at infinite redshift, natural units.
+
+    The distance is computed by Gauss-Legendre quadrature, with 
+    1 / (1 + z) = u**2. The Universe must have a big bang.
+
+    :param matter: mater density (adimensional)
+    :param vacuum: vacuum energy density (adimensional)
+    :returns: comoving distance at infinite redshift
+
+    '''
+    ok = 1 - matter - vacuum
+    return float(integrate(lambda u: 2 / np.sqrt(matter + u * u * (ok + vacuum * u**4)), 
+                           0.0, 1.0, 1e-15))
+
 class FlrwBaseImpl(object):
     '''The Friedmann-Lemaitre-Robertson-Walker metric
 
     This class represents a FLRW metric. Its methods compute the
     common cosmological distances and times.
     '''
+    __slots__ = ('om', 'ov', 'ok', 'kap', 'sqok', '_series')
+
     def __init__(self, matter, vacuum):
         '''The constructor takes three parameters:
 
@@ -38,8 +355,11 @@ class FlrwBaseImpl(object):
         self.om = matter
         self.ov = vacuum
         self.ok = 1 - matter - vacuum
-        self.kap = -1 if self.ok > 0 else 1
-        self.sqok = math.sqrt(abs(self.ok))
+        # the parameters can be arrays, if ok has the same sign in all
+        self.kap = -1 if np.all(self.ok > 0) else 1
+        self.sqok = np.sqrt(np.abs(self.ok))
+        # computed when needed
+        self._series = None
 
     @property 
     def matter(self):
@@ -49,14 +369,29 @@ class FlrwBaseImpl(object):
     def vaccum(self):
         return self.ov
 
-    def age(self, z=None):
+    @property 
+    def vacuum(self):
+        return self.ov
+
+    def _time_integrand(self, u):
+        '''Integrand of the times, with 1 / (1 + z) = u**2.'''
+        u2 = u * u
+        return 2 * u2 / np.sqrt(_nodes(self.om) + 
+                                u2 * (_nodes(self.ok) + _nodes(self.ov) * u2 * u2))
+
+    def age(self, z=None, rtol=1e-10):
         '''Return the age of the Universe [Gyr].
 
+        The age is computed by Gauss-Legendre quadrature.
+
         :param z: redshift
+        :param rtol: relative tolerance of the quadrature
         :returns: age of the Universe [Gyr].
 
         '''
-        raise NotImplementedError
+        if z is None:
+            z = 0.0
+        return integrate(self._time_integrand, 0.0, 1 / np.sqrt(1 + np.asarray(z)), rtol)
 
     def angular_scale(self, z):
         '''Return the factor to transform angular sizes in pc to arc sec.
@@ -79,12 +414,54 @@ class FlrwBaseImpl(object):
     def dl(self, z):
         '''Return the luminosity distance [Mpc].
 
+        The closed form of the model is replaced by series expansions
+        of the comoving distance at low and high redshift, where they 
+        are exact in double precision.
+
         :param z: redshift
         :returns: luminosity distance [Mpc]
 
         '''
+        series = self._expansions()
+        if series is None:
+            return self._dl(z)
+        zlow, low, zhigh, high = series
+        z = np.asarray(z, dtype='float')
+        lowz = np.abs(z) <= zlow
+        highz = (z >= zhigh) & ~lowz
+        if not (lowz.any() or highz.any()):
+            return self._dl(z)
+        dc = np.empty(z.shape)
+        zl = z[lowz]
+        dc[lowz] = zl * np.polyval(low, zl)
+        if highz.any():
+            v = 1 / (1 + z[highz])
+            dcinf = infinite_distance(self.om, self.ov)
+            dc[highz] = dcinf - np.sqrt(v) * np.polyval(high, v)
+        covered = lowz | highz
+        res = np.empty(z.shape)
+        res[covered] = (1 + z[covered]) * self._dm(dc[covered])
+        mid = ~covered
+        if mid.any():
+            res[mid] = self._dl(z[mid])
+        return res[()]
+
+    def _dl(self, z):
+        '''Closed form of the luminosity distance.'''
         raise NotImplementedError
 
+    def _expansions(self):
+        '''Series of the comoving distance, None for arrays of parameters.'''
+        if self._series is None:
+            if np.ndim(self.om) > 0 or np.ndim(self.ov) > 0:
+                self._series = ()
+            else:
+                zlow, low, zhigh, high = distance_series(self.om, self.ov)
+                # in the order of numpy.polyval
+                self._series = (zlow, low[::-1], zhigh, 
+                                None if high is None else high[::-1])
+        return self._series or None
+
     def dm(self, z):
         '''Return the comoving distance in transverse direction [Mpc].
 
@@ -103,14 +480,17 @@ class FlrwBaseImpl(object):
         '''
         return self.dl(z) / ((1 + z) * (1 + z))
 
-    def lt(self, z):
+    def lt(self, z, rtol=1e-10):
         '''Return the look-back time [Gyr].
+
+        The look-back time is computed by Gauss-Legendre quadrature.
         
         :param z: redshift
+        :param rtol: relative tolerance of the quadrature
         :returns: look-back time [Gyr]
         
         '''
-        return self.age(0) - self.age(z)
+        return integrate(self._time_integrand, 1 / np.sqrt(1 + np.asarray(z)), 1.0, rtol)
 
     def vol(self, z):
         '''Return comoving volume per solid angle [Mpc^3 sr^-1]
@@ -121,6 +501,170 @@ class FlrwBaseImpl(object):
         '''
         raise NotImplementedError
 
+    def hubble_function(self, z):
+        '''Return the Hubble function E(z) = H(z) / H_0.
+
+        :param z: redshift
+        :returns: Hubble function [adimensional]
+
+        '''
+        a = 1 + np.asarray(z)
+        return np.sqrt(a * a * (self.om * a + self.ok) + self.ov)
+
+    def ddc_dz(self, z):
+        '''Return the derivative of the comoving distance [adimensional].
+
+        :param z: redshift
+        :returns: derivative of the comoving distance with redshift [adimensional]
+
+        '''
+        return 1 / self.hubble_function(z)
+
+    def dvol_dz(self, z):
+        '''Return differential comoving volume per solid angle [adimensional].
+
+        The curvature enters only through the transverse distance,
+        dV / dz = dm**2 / E(z).
+
+        :param z: redshift
+        :returns: derivative of the comoving volume per solid angle with
+                  redshift [adimensional]
+
+        '''
+        dm = self.dm(z)
+        return dm * dm / self.hubble_function(z)
+
+    def evaluate(self, z, quantities=QUANTITIES):
+        '''Return several quantities at the same redshifts.
+
+        The luminosity distance is computed once, the other 
+        distances and the volume are derived from it.
+
+        :param z: redshift
+        :param quantities: names of the methods to evaluate
+        :returns: a dictionary with the values of each quantity
+
+        '''
+        res = {}
+        dl = dm = dc = None
+        for q in quantities:
+            if q in ('dc', 'dm', 'da', 'dl', 'vol', 'dvol_dz'):
+                if dl is None:
+                    dl = self.dl(z)
+                    dm = dl / (1 + z)
+                if q == 'dl':
+                    res[q] = dl
+                elif q == 'dm':
+                    res[q] = dm
+                elif q == 'da':
+                    res[q] = dm / (1 + z)
+                elif q == 'dvol_dz':
+                    res[q] = dm * dm / self.hubble_function(z)
+                else:
+                    if dc is None:
+                        dc = self._dc(dm)
+                        if dc is dm:
+                            # flat models, the results must not share memory
+                            dc = np.array(dm)[()]
+                    res[q] = dc if q == 'dc' else self._vol(dm, dc)
+            elif q in ('lt', 'age', 'hubble_function', 'ddc_dz'):
+                res[q] = getattr(self, q)(z)
+            else:
+                raise ValueError('unknown quantity %r' % q)
+        return res
+
+    def tabulate(self, zmin, zmax, rtol=1e-8, cache=None):
+        '''Return interpolation tables of the metric.
+
+        :param zmin: lower redshift of the table
+        :param zmax: upper redshift of the table
+        :param rtol: relative tolerance of the interpolation
+        :param cache: a milia.cache.TableCache, or its directory, where
+                      the tables are stored and read, None to compute them
+        :returns: a FlrwTable, with the same methods as the metric
+
+        '''
+        if cache is not None:
+            from milia.cache import cached_table
+            return cached_table(self, zmin, zmax, rtol, cache)
+        from milia.tabulate import FlrwTable
+        return FlrwTable(self, zmin, zmax, rtol)
+
+    def stream(self, quantities, iterable, chunk_size=65536):
+        '''Evaluate quantities over a stream of redshifts.
+
+        :param quantities: name of a method, or names of several methods
+        :param iterable: iterable of redshifts, scalars or array-like
+        :param chunk_size: number of redshifts of each result
+        :returns: a generator of arrays, or of dictionaries of arrays
+
+        '''
+        from milia.stream import stream
+        return stream(self, quantities, iterable, chunk_size)
+
+    def z_at(self, quantity, values, branch='near', zmax=1e4):
+        '''Return the redshift where a quantity takes some values.
+
+        :param quantity: one of 'dc', 'dm', 'dl', 'da', 'lt', 'age' or 'vol'
+        :param values: values of the quantity, scalar or array-like
+        :param branch: branch of the solution for 'da', 'near' or 'far'
+        :param zmax: maximum redshift of the solutions
+        :returns: redshifts, NaN where the value is not reached
+
+        '''
+        from milia.inverse import z_at
+        return z_at(self, quantity, values, branch, zmax)
+
+    def dc_between(self, z1, z2):
+        '''Return the comoving distance between two redshifts [Mpc].
+
+        :param z1: redshift of the first object, scalar or array-like
+        :param z2: redshift of the second object, scalar or array-like
+        :returns: comoving distance in the line of sight, with the shape 
+                  of z1 and z2 broadcast [Mpc]
+
+        '''
+        from milia.lensing import dc_between
+        return dc_between(self, z1, z2)
+
+    def da_between(self, z1, z2):
+        '''Return the angular distance of an object at z2 seen from z1 [Mpc].
+
+        :param z1: redshift of the observer, scalar or array-like
+        :param z2: redshift of the object, scalar or array-like
+        :returns: angular distance, with the shape of z1 and z2 
+                  broadcast [Mpc]
+
+        '''
+        from milia.lensing import da_between
+        return da_between(self, z1, z2)
+
+    def jacobian(self, quantity, z, rtol=1e-10):
+        '''Return the derivatives of a quantity with respect to the parameters.
+
+        :param quantity: name of the method, 'dc', 'dm', 'da', 'dl', 'vol', 
+                         'lt', 'age', 'hubble_function', 'ddc_dz' or 'dvol_dz'
+        :param z: redshift, scalar or array-like
+        :param rtol: relative tolerance of the quadrature
+        :returns: array with the derivatives with respect to matter
+                  and vacuum along the first axis
+
+        '''
+        from milia.jacobian import jacobian
+        return jacobian(self, quantity, z, rtol)
+
+    def _dc(self, dm):
+        '''Comoving distance from transverse comoving distance.'''
+        raise NotImplementedError
+
+    def _dm(self, dc):
+        '''Transverse comoving distance from comoving distance.'''
+        raise NotImplementedError
+
+    def _vol(self, dm, dc):
+        '''Comoving volume from transverse and line of sight distances.'''
+        raise NotImplementedError
+
     def __str__(self):
         return 'milia.Flrw(matter=%f, vacuum=%f)' % (self.om, self.ov)
 
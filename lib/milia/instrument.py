@@ -0,0 +1,141 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Call counters and timings of the pure backend
+
+The instrumentation is disabled by default. When enabled, the methods
+of the models and of pure.Flrw are replaced by wrappers that count the
+calls, the redshifts processed and the time spent, for each class,
+model and method. The times are cumulative, they include the calls made
+by the method to other methods. The evaluations of the elliptic
+integrals by the models are counted too. When disabled, the original 
+methods are restored, and there is no overhead.
+
+The compiled classes cannot be instrumented.
+'''
+
+import functools
+import time
+
+import numpy as np
+
+from milia import factory, flatmodels, nonflatmodels, pure
+
+METHODS = ('age', 'dc', 'dm', 'da', 'dl', 'lt', 'vol', 'hubble_function',
+           'ddc_dz', 'dvol_dz', 'evaluate')
+
+# modules that call the elliptic integrals, and the functions they call
+_ELLIPTIC_MODULES = (flatmodels, nonflatmodels)
+_ELLIPTIC_FUNCTIONS = ('ellipf', 'ellipf_acos')
+
+_stats = {}
+_elliptic = [0, 0]
+# saved attributes, None for the inherited ones
+_saved = {}
+
+def _wrap(fun, name, key_of):
+    @functools.wraps(fun)
+    def wrapper(self, *args, **kwds):
+        start = time.perf_counter()
+        try:
+            return fun(self, *args, **kwds)
+        finally:
+            elapsed = time.perf_counter() - start
+            key = key_of(self) + (name,)
+            stat = _stats.get(key)
+            if stat is None:
+                stat = _stats[key] = [0, 0, 0.0]
+            stat[0] += 1
+            stat[1] += np.size(args[0]) if args else 1
+            stat[2] += elapsed
+    return wrapper
+
+def _counting_elliptic(fun):
+    @functools.wraps(fun)
+    def wrapper(*args):
+        res = fun(*args)
+        _elliptic[0] += 1
+        _elliptic[1] += np.size(res)
+        return res
+    return wrapper
+
+def _model_key(self):
+    return ('FlrwNat', type(self).__name__)
+
+def _metric_key(self):
+    return ('Flrw', type(self.nat).__name__)
+
+def _targets():
+    targets = [(cls, _model_key) for cls in factory.BRANCHES]
+    targets.append((pure.Flrw, _metric_key))
+    return targets
+
+def enabled():
+    '''Return True if the instrumentation is enabled.'''
+    return bool(_saved)
+
+def enable():
+    '''Replace the methods of the pure backend by instrumented versions.'''
+    if enabled():
+        return
+    # the original methods are read before any replacement
+    wrappers = []
+    for cls, key_of in _targets():
+        for name in METHODS:
+            if hasattr(cls, name):
+                _saved[cls, name] = cls.__dict__.get(name)
+                wrappers.append((cls, name,
+                                 _wrap(getattr(cls, name), name, key_of)))
+    for module in _ELLIPTIC_MODULES:
+        for name in _ELLIPTIC_FUNCTIONS:
+            if hasattr(module, name):
+                _saved[module, name] = getattr(module, name)
+                setattr(module, name, _counting_elliptic(getattr(module, name)))
+    for cls, name, wrapper in wrappers:
+        setattr(cls, name, wrapper)
+
+def disable():
+    '''Restore the original methods.'''
+    for (owner, name), value in _saved.items():
+        if value is None:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, value)
+    _saved.clear()
+
+def reset():
+    '''Set the counters to zero.'''
+    _stats.clear()
+    _elliptic[:] = [0, 0]
+
+def report():
+    '''Return the counters.
+
+    :returns: a dictionary, with a list of records with keys 'class',
+              'model', 'method', 'calls', 'elements' and 'time' (in seconds),
+              in 'methods', and the number of calls and of elements of the
+              elliptic integrals in 'elliptic'
+    '''
+    methods = []
+    for key in sorted(_stats):
+        calls, elements, elapsed = _stats[key]
+        methods.append({'class': key[0], 'model': key[1], 'method': key[2],
+                        'calls': calls, 'elements': elements,
+                        'time': elapsed})
+    return {'methods': methods,
+            'elliptic': {'calls': _elliptic[0], 'elements': _elliptic[1]}}
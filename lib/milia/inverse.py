@@ -0,0 +1,160 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Redshift as a function of distances, times and volumes'''
+
+from __future__ import division
+
+import numpy as np
+
+from milia.tabulate import metric_parameters
+
+# Number of nodes of the table used to bracket the roots
+_GRID_SIZE = 256
+_MAX_ITER = 100
+
+def _derivative(params, quantity, z, dm):
+    '''Derivative of a quantity with respect to redshift.'''
+    matter, vacuum, radius, time = params
+    ok = 1 - matter - vacuum
+    a = 1 + z
+    efun = np.sqrt(matter * a**3 + ok * a * a + vacuum)
+    if quantity == 'lt':
+        return time / (a * efun)
+    elif quantity == 'age':
+        return -time / (a * efun)
+    ddc = radius / efun
+    if quantity == 'dc':
+        return ddc
+    xn = dm / radius
+    ddm = ddc * np.sqrt(1 + ok * xn * xn)
+    if quantity == 'dm':
+        return ddm
+    elif quantity == 'dl':
+        return dm + a * ddm
+    elif quantity == 'da':
+        return ddm / a - dm / (a * a)
+    elif quantity == 'vol':
+        return dm * dm * ddc
+    raise ValueError('unknown quantity %r' % quantity)
+
+def _evaluate(metric, params, quantity, z):
+    '''Value and derivative of a quantity.'''
+    if quantity in ('lt', 'age'):
+        val = metric.evaluate(z, (quantity,))[quantity]
+        return val + np.zeros_like(z), _derivative(params, quantity, z, None)
+    res = metric.evaluate(z, ('dm', quantity))
+    return res[quantity], _derivative(params, quantity, z, res['dm'])
+
+def _da_peak(metric, params, lo, hi):
+    '''Redshift of the maximum of the angular distance, by bisection.'''
+    for _ in range(_MAX_ITER):
+        mid = 0.5 * (lo + hi)
+        _, deriv = _evaluate(metric, params, 'da', np.array([mid]))
+        if deriv[0] > 0:
+            lo = mid
+        else:
+            hi = mid
+        if hi - lo <= 1e-15 * (1 + mid):
+            break
+    return 0.5 * (lo + hi)
+
+def z_at(metric, quantity, values, branch='near', zmax=1e4):
+    '''Return the redshift where a quantity of the metric takes some values.
+
+    The roots are bracketed in a table of the quantity, and then refined
+    with Newton iterations, safeguarded with bisection.
+
+    The angular distance has a maximum, and two redshifts
+    correspond to each value, the solution in the branch
+    below the maximum ('near') or above the maximum ('far') is returned.
+
+    :param metric: the metric, of any backend
+    :param quantity: one of 'dc', 'dm', 'dl', 'da', 'lt', 'age' or 'vol'
+    :param values: values of the quantity, scalar or array-like
+    :param branch: branch of the solution for 'da', 'near' or 'far'
+    :param zmax: maximum redshift of the solutions
+    :returns: redshifts, NaN where the value is not reached in [0, zmax]
+
+    '''
+    if quantity not in ('dc', 'dm', 'dl', 'da', 'lt', 'age', 'vol'):
+        raise ValueError('unknown quantity %r' % quantity)
+    if branch not in ('near', 'far'):
+        raise ValueError('branch must be "near" or "far"')
+
+    params = metric_parameters(metric)
+    values = np.asarray(values, dtype='float')
+
+    zgrid = np.expm1(np.linspace(0, np.log1p(zmax), _GRID_SIZE))
+    fgrid, _ = _evaluate(metric, params, quantity, zgrid)
+    # we search the roots of sign * (quantity - value), increasing
+    sign = -1 if quantity == 'age' else 1
+    if quantity == 'da':
+        i = np.argmax(fgrid)
+        lo = zgrid[max(i - 1, 0)]
+        hi = zgrid[min(i + 1, _GRID_SIZE - 1)]
+        zpeak = _da_peak(metric, params, lo, hi)
+        fpeak, _ = _evaluate(metric, params, quantity, np.array([zpeak]))
+        if branch == 'near':
+            keep = zgrid < zpeak
+            zgrid = np.append(zgrid[keep], zpeak)
+            fgrid = np.append(fgrid[keep], fpeak)
+        else:
+            keep = zgrid > zpeak
+            zgrid = np.insert(zgrid[keep], 0, zpeak)
+            fgrid = np.insert(fgrid[keep], 0, fpeak)
+            sign = -1
+    fgrid = sign * fgrid
+    target = sign * values.reshape(-1)
+
+    result = np.empty_like(target)
+    result.fill(np.nan)
+    j = np.searchsorted(fgrid, target)
+    exact = target == fgrid[0]
+    result[exact] = zgrid[0]
+    valid = (j > 0) & (j < len(zgrid))
+    j = j[valid]
+    t = target[valid]
+    lo = zgrid[j - 1]
+    hi = zgrid[j]
+    # linear interpolation in the table as initial guess
+    w = (t - fgrid[j - 1]) / (fgrid[j] - fgrid[j - 1])
+    zc = lo + w * (hi - lo)
+
+    for _ in range(_MAX_ITER):
+        if zc.size == 0:
+            break
+        fval, fder = _evaluate(metric, params, quantity, zc)
+        f = sign * fval - t
+        neg = f < 0
+        lo = np.where(neg, zc, lo)
+        hi = np.where(neg, hi, zc)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            znew = zc - f / (sign * fder)
+        bisect = ~((znew > lo) & (znew < hi))
+        znew = np.where(bisect, 0.5 * (lo + hi), znew)
+        done = np.abs(znew - zc) <= 1e-14 * (1 + zc)
+        zc = np.where(f == 0, zc, znew)
+        if done.all():
+            break
+
+    result[valid] = zc
+    result = result.reshape(values.shape)
+    if result.ndim == 0:
+        return float(result)
+    return result
@@ -0,0 +1,151 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Derivatives of the distances and times with respect to the parameters
+
+The derivatives of the comoving distance and of the times with respect
+to matter and vacuum are integrals, computed by Gauss-Legendre quadrature
+with 1 / (1 + z) = u**2, the same variable used for the times. The
+derivatives of the other distances and of the volume follow from them,
+the curvature enters through the transverse distance. The derivatives
+are smooth across the branches of the models.
+'''
+
+from __future__ import division
+
+import numpy as np
+
+from milia.impl import integrate
+from milia.tabulate import metric_parameters, sinc
+
+QUANTITIES = ('dc', 'dm', 'da', 'dl', 'vol', 'lt', 'age',
+              'hubble_function', 'ddc_dz', 'dvol_dz')
+
+# Below this value of |ok * dc**2| series expansions are used
+_SERIES_LIMIT = 1e-3
+
+def _curvature_terms(ok, chi):
+    '''Transverse distance and volume, and their derivatives with 
+    respect to ok at constant comoving distance, natural units.
+
+    They are computed from the comoving distance, so that closed
+    models are correct beyond sqrt(-ok) * chi = pi / 2.
+    '''
+    x = ok * chi * chi
+    chi3 = chi * chi * chi
+    dm = sinc(ok, chi)
+    if ok > 0:
+        cosk = np.cosh(np.sqrt(ok) * chi)
+    elif ok < 0:
+        cosk = np.cos(np.sqrt(-ok) * chi)
+    else:
+        cosk = np.ones_like(chi)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vol = (dm * cosk - chi) / (2 * ok)
+        ddm = (chi * cosk - dm) / (2 * ok)
+        dvol = (ddm * cosk + 0.5 * chi * dm * dm) / (2 * ok) - vol / ok
+    small = np.abs(x) < _SERIES_LIMIT
+    vol = np.where(small, chi3 * (1 / 3 + x * (1 / 15 + x * (2 / 315 + x / 2835))), vol)
+    ddm = np.where(small, chi3 * (1 / 6 + x * (1 / 60 + x / 1680)), ddm)
+    dvol = np.where(small, chi3 * chi * chi * (1 / 15 + x * (4 / 315 + x / 945)), dvol)
+    return dm, cosk, vol, ddm, dvol
+
+def jacobian(metric, quantity, z, rtol=1e-10):
+    '''Derivatives of a quantity with respect to the parameters of a metric.
+
+    :param metric: a Flrw or FlrwNat object, of any backend
+    :param quantity: one of 'dc', 'dm', 'da', 'dl', 'vol', 'lt', 'age',
+                     'hubble_function', 'ddc_dz' or 'dvol_dz'
+    :param z: redshift, scalar or array-like
+    :param rtol: relative tolerance of the quadrature
+    :returns: array with the derivatives with respect to hubble, matter
+              and vacuum along the first axis, and the shape of z along
+              the others; metrics in natural units have no hubble row
+
+    '''
+    if quantity not in QUANTITIES:
+        raise ValueError('unknown quantity %r' % quantity)
+    matter, vacuum, radius, time = metric_parameters(metric)
+    hubble = getattr(metric, 'hubble', None)
+    ok = 1 - matter - vacuum
+    z = np.asarray(z, dtype='float')
+    a = 1 + z
+    s = 1 / np.sqrt(a)
+
+    def gfun(u):
+        u2 = u * u
+        return matter + u2 * (ok + vacuum * u2 * u2)
+
+    # derivatives of u**6 E(z)**2 with respect to matter and vacuum
+    dgfun = (lambda u: 1 - u * u, lambda u: u**6 - u * u)
+    # derivatives of E(z)**2
+    de2 = (a * a * (a - 1), 1 - a * a)
+    efun = np.sqrt(a * a * (matter * a + ok) + vacuum)
+
+    if quantity in ('lt', 'age'):
+        value = getattr(metric, quantity)(z)
+        lo, hi = (s, 1.0) if quantity == 'lt' else (0.0, s)
+        rows = [-time * integrate(lambda u: u * u * dg(u) / gfun(u)**1.5, lo, hi, rtol)
+                for dg in dgfun]
+        scale = 1
+    elif quantity in ('hubble_function', 'ddc_dz'):
+        if quantity == 'hubble_function':
+            value = efun
+            rows = [d / (2 * efun) for d in de2]
+            scale = 0
+        else:
+            value = radius / efun
+            rows = [-radius * d / (2 * efun**3) for d in de2]
+            scale = 1
+    else:
+        # chi is the comoving distance by quadrature, the comoving 
+        # distance of the metric is folded by the inverse of sin 
+        # in closed models, beyond cosk = 0
+        chi = integrate(lambda u: 2 / np.sqrt(gfun(u)), s, 1.0, min(rtol, 1e-13))
+        dm, cosk, vol, ddm_ok, dvol_ok = _curvature_terms(ok, chi)
+        dc = chi
+        if ok < 0:
+            dc = np.where(np.sqrt(-ok) * chi > np.pi / 2, 
+                          np.arcsin(np.sqrt(-ok) * dm) / np.sqrt(-ok), chi)
+        rows = []
+        for dg, d in zip(dgfun, de2):
+            dchi = -integrate(lambda u: dg(u) / gfun(u)**1.5, s, 1.0, rtol)
+            # d ok / d matter = d ok / d vacuum = -1
+            ddm = cosk * dchi - ddm_ok
+            if quantity == 'dc':
+                if ok < 0:
+                    # derivative of arcsin(sin(sqrt(-ok) chi)) / sqrt(-ok)
+                    dchi = np.sign(cosk) * (dchi - chi / (2 * ok)) + dc / (2 * ok)
+                rows.append(radius * dchi)
+            elif quantity == 'dm':
+                rows.append(radius * ddm)
+            elif quantity == 'dl':
+                rows.append(radius * a * ddm)
+            elif quantity == 'da':
+                rows.append(radius * ddm / a)
+            elif quantity == 'vol':
+                rows.append(radius**3 * (dm * dm * dchi - dvol_ok))
+            else:
+                rows.append(radius**3 * dm * (2 * ddm - dm * d / (2 * efun * efun)) / efun)
+        value = {'dc': radius * dc, 'dm': radius * dm, 'dl': radius * a * dm,
+                 'da': radius * dm / a, 'vol': radius**3 * vol,
+                 'dvol_dz': radius**3 * dm * dm / efun}[quantity]
+        scale = 3 if quantity in ('vol', 'dvol_dz') else 1
+    if hubble is not None:
+        rows.insert(0, -scale * np.asarray(value) / hubble)
+    return np.array([row + np.zeros_like(z) for row in rows])
@@ -0,0 +1,94 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''Distances between two redshifts
+
+The comoving distance is evaluated once for each different redshift,
+a matrix of pairs of N and M redshifts costs N + M evaluations.
+'''
+
+from __future__ import division
+
+import numpy as np
+
+from milia.tabulate import metric_parameters, sinc
+
+def _pairs(metric, z1, z2):
+    '''Comoving distance between the redshifts, and z2 as an array.
+
+    The redshifts are made unique before they are broadcast, the
+    cost is linear in the sizes of z1 and z2.
+    '''
+    z1 = np.asarray(z1, dtype='float')
+    z2 = np.asarray(z2, dtype='float')
+    zu1, inv1 = np.unique(z1, return_inverse=True)
+    zu2, inv2 = np.unique(z2, return_inverse=True)
+    zu, inv = np.unique(np.concatenate([zu1, zu2]), return_inverse=True)
+    dcu = np.asarray(metric.evaluate(zu, ('dc',))['dc'])[inv.reshape(-1)]
+    dc1 = dcu[:zu1.size][inv1.reshape(-1)].reshape(z1.shape)
+    dc2 = dcu[zu1.size:][inv2.reshape(-1)].reshape(z2.shape)
+    return dc2 - dc1, z2
+
+def _result(res):
+    if res.ndim == 0:
+        return float(res)
+    return res
+
+def dc_between(metric, z1, z2):
+    '''Comoving distance in the line of sight between two redshifts.
+
+    :param metric: the metric, of any backend
+    :param z1: redshift of the first object, scalar or array-like
+    :param z2: redshift of the second object, scalar or array-like
+    :returns: comoving distance, with the shape of z1 and z2 broadcast,
+              negative if z2 < z1
+
+    '''
+    dc12, _ = _pairs(metric, z1, z2)
+    return _result(dc12)
+
+def dm_between(metric, z1, z2):
+    '''Comoving distance in transverse direction between two redshifts.
+
+    :param metric: the metric, of any backend
+    :param z1: redshift of the first object, scalar or array-like
+    :param z2: redshift of the second object, scalar or array-like
+    :returns: transverse comoving distance, with the shape of z1 and z2
+              broadcast
+
+    '''
+    matter, vacuum, radius, _ = metric_parameters(metric)
+    dc12, _ = _pairs(metric, z1, z2)
+    return _result(radius * sinc(1 - matter - vacuum, dc12 / radius))
+
+def da_between(metric, z1, z2):
+    '''Angular distance of an object at z2 seen from z1.
+
+    This is the distance between the lens and the source in
+    gravitational lensing.
+
+    :param metric: the metric, of any backend
+    :param z1: redshift of the observer (the lens), scalar or array-like
+    :param z2: redshift of the object (the source), scalar or array-like
+    :returns: angular distance, with the shape of z1 and z2 broadcast
+
+    '''
+    matter, vacuum, radius, _ = metric_parameters(metric)
+    dc12, z2 = _pairs(metric, z1, z2)
+    return _result(radius * sinc(1 - matter - vacuum, dc12 / radius) / (1 + z2))
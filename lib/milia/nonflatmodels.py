@@ -21,46 +21,64 @@
 from __future__ import division
 
 import math
-from scipy.special import cbrt, ellipkinc
 
-from impl import FlrwBaseImpl
+import numpy as np
+
+from .impl import FlrwBaseImpl, ellipf, ellipf_acos
+from .impl import VOLUME_SERIES_LIMIT, volume_series
 
 M_SQRT3 = math.sqrt(3)
 M_4THRT3 = math.sqrt(M_SQRT3)
 
 def sinc(k, a, x):
     if k == 1:
-        return math.sin(a * x) / a
+        return np.sin(a * x) / a
     elif k == -1:
-        return math.sinh(a * x) / a
+        return np.sinh(a * x) / a
     elif k == 0:
         return x
     return 0
 
 def asinc(k, a, x):
     if k == 1:
-        return math.asin(a * x) / a
+        return np.arcsin(a * x) / a
     elif k == -1:
-        return math.asinh(a * x) / a
+        return np.arcsinh(a * x) / a
     elif k == 0:
         return x
     return 0
 
 # NonFlat models
+# Every quantity that does not depend on the redshift is computed
+# in the constructor
 
 class FlrwNonFlat(FlrwBaseImpl):
+    __slots__ = ()
+
     def __init__(self, matter, vacuum):
         super(FlrwNonFlat, self).__init__(matter, vacuum)
 
     def dc(self, z):
-        dm = self.dm(z)
-        return asinc(self.kap, self.sqok, dm)
+        return self._dc(self.dm(z))
 
     def vol(self, z):
         dm = self.dm(z)
-        return (dm * math.sqrt(1 + self.ok * dm * dm) - asinc(self.kap, self.sqok, dm)) / (2 * self.ok)
+        return self._vol(dm, self._dc(dm))
+
+    def _dc(self, dm):
+        return asinc(self.kap, self.sqok, dm)
+
+    def _dm(self, dc):
+        return sinc(self.kap, self.sqok, dc)
+
+    def _vol(self, dm, dc):
+        u = self.ok * dm * dm
+        closed = (dm * np.sqrt(1 + u) - dc) / (2 * self.ok)
+        return np.where(np.abs(u) < VOLUME_SERIES_LIMIT, volume_series(dm, u), closed)[()]
 
 class Flrw_OM_OV_0(FlrwNonFlat):
+    __slots__ = ()
+
     def __init__(self):
         super(Flrw_OM_OV_0, self).__init__(0.0, 0.0)
 
@@ -71,90 +89,136 @@ class Flrw_OM_OV_0(FlrwNonFlat):
         return 1 / (1 + z)
 
 class Flrw_OM(FlrwNonFlat):
+    __slots__ = ('c1', 'c2', 'age_arg', 'age_factor')
+
     def __init__(self, vacuum):
         super(Flrw_OM, self).__init__(0.0, vacuum)
+        self.c1 = 1 / self.ov
+        self.c2 = 1 - self.ov
+        self.age_arg = 1 / np.sqrt(1 / self.ov - 1)
+        self.age_factor = 1 / np.sqrt(self.ov)
 
-    def dl(self, z):
-        return ((1 + z) / self.ov) * (1 + z - math.sqrt(self.ov + (1 - self.ov) * (1 + z)*(1+z)))
+    def _dl(self, z):
+        a = 1 + z
+        return a * self.c1 * (a - np.sqrt(self.ov + self.c2 * a * a))
 
     def age(self, z):
-        return math.asinh(1 / ((1 + z) * math.sqrt(1 / self.ov - 1))) / math.sqrt(self.ov)
+        return np.arcsinh(self.age_arg / (1 + z)) * self.age_factor
 
 class Flrw_OV(FlrwNonFlat):
+    __slots__ = ('pre0', 'c1', 'c2', 'c3')
+
     def __init__(self, matter):
         super(Flrw_OV, self).__init__(matter, 0.0)
 
         self.pre0 = 1 - matter
+        self.c1 = 2 - self.om
+        self.c2 = 2 / (self.om * self.om)
+        self.c3 = self.om / self.pre0
 
     def pre(self, z):
-        return math.sqrt(1 + self.om * z)
+        return np.sqrt(1 + self.om * z)
 
-    def dl(self, z):
-        return 2 * ((2 - self.om * (1 - z) - (2 - self.om) * math.sqrt(1 + self.om * z))) / (self.om * self.om)
+    def _dl(self, z):
+        return self.c2 * (self.c1 + self.om * z - self.c1 * np.sqrt(1 + self.om * z))
 
 class Flrw_OV_1(Flrw_OV):
+    __slots__ = ('sqpre0',)
+
     def __init__(self, matter):
         super(Flrw_OV_1, self).__init__(matter)
+        self.sqpre0 = np.sqrt(self.pre0)
 
     def age(self, z):
         prez = self.pre(z)
-        pre0 = self.pre0
-        return (prez / (1 + z) - self.om / math.sqrt(pre0) * math.atanh(math.sqrt(pre0) / prez)) / self.pre0
+        return prez / ((1 + z) * self.pre0) - self.c3 / self.sqpre0 * np.arctanh(self.sqpre0 / prez)
 
 class Flrw_OV_2(Flrw_OV):
+    __slots__ = ('sqpre0',)
+
     def __init__(self, matter):
         super(Flrw_OV_2, self).__init__(matter)
+        self.sqpre0 = np.sqrt(-self.pre0)
 
     def age(self, z):
         prez = self.pre(z)
-        pre0 = self.pre0
-        return (prez / (1 + z) - self.om / math.sqrt(-pre0) * math.atan(math.sqrt(-pre0) / prez)) / self.pre0
-        
+        return prez / ((1 + z) * self.pre0) - self.c3 / self.sqpre0 * np.arctan(self.sqpre0 / prez)
 
 class FlrwA(FlrwNonFlat):
+    __slots__ = ('crit', 'k', 'g', 'ell0', 'factor')
+
     def __init__(self, matter, vacuum, crit):
         super(FlrwA, self).__init__(matter, vacuum)
         self.crit = crit
+        self.factor = 1 / self.sqok
 
 class FlrwA1(FlrwA):
+    __slots__ = ('sup', 'up', 'down', 'delta')
+
     def __init__(self, matter, vacuum, crit):
         super(FlrwA1, self).__init__(matter, vacuum, crit)
-
-    def dl(self, z):
-        v = cbrt(self.kap * (self.crit - 1) + math.sqrt(self.crit * (self.crit - 2)))
+        v = np.cbrt(self.kap * (self.crit - 1) + np.sqrt(self.crit * (self.crit - 2)))
         y = (-1 + self.kap * (v + 1. / v)) / 3
-        A = math.sqrt(y * (3 * y + 2))
-        g = 1 / math.sqrt(A)
-        k = 0.5 + 0.25 * g * g * (v + 1 / v)
-        sup = self.om / abs(self.ok)
-        phi = math.acos(((1 + z) * sup + self.kap * y - A) / ((1 + z) * sup + self.kap * y + A))
-        phi0 = math.acos((sup + self.kap * y - A) / (sup + self.kap * y + A)) 
-        return (1 + z) / self.sqok * sinc(self.kap, 1.0, g * (ellipkinc(phi0, k) - ellipkinc(phi, k)))
-
-    def age(self, z):
-        return 0.0
+        A = np.sqrt(y * (3 * y + 2))
+        self.g = 1 / np.sqrt(A)
+        self.k = 0.5 + 0.25 * self.g * self.g * (v + 1 / v)
+        self.sup = self.om / abs(self.ok)
+        self.up = self.kap * y - A
+        self.down = self.kap * y + A
+        # the amplitude of the elliptic integral is arccos((x + up) / (x + down))
+        self.delta = 2 * A
+        self.ell0 = self._ell(self.sup)
+
+    def _ell(self, arg):
+        return ellipf_acos((arg + self.up) / (arg + self.down), 
+                           self.delta / (arg + self.down), self.k)
+
+    def _dl(self, z):
+        ell = self._ell((1 + z) * self.sup)
+        return (1 + z) * self.factor * sinc(self.kap, 1.0, self.g * (self.ell0 - ell))
 
 class FlrwA2(FlrwA):
-    def __init__(self, matter, vacuum):
-        super(FlrwA2, self).__init__(matter, vacuum)
+    __slots__ = ('arg1', 'y1', 'y2', 'y12')
 
-    def dl(self, z):
-        arg0 = math.acos(1 - self.crit) / 3
-        arg1 = self.om / abs(self.ok);
-        y1 = (-1 + math.cos(arg0) + M_SQRT3 * math.sin(arg0)) / 3
-        y2 = (-1 - 2 * math.cos(arg0)) / 3
-        y3 = (-1 + math.cos(arg0) - M_SQRT3 * math.sin(arg0)) / 3
-        g = 2 / math.sqrt(y1 - y2)
-        k = (y1 - y3) / (y1 - y2)
-        phi = math.asin(math.sqrt((y1 - y2) / ((1 + z) * arg1 + y1)))
-        phi0 = math.asin(math.sqrt((y1 - y2) / (arg1 + y1)))
-        return (1. + z) / self.sqok * math.sin(g * (ellipkinc(phi0, k) - ellipkinc(phi, k)))
+    def __init__(self, matter, vacuum, crit):
+        super(FlrwA2, self).__init__(matter, vacuum, crit)
+        arg0 = np.arccos(1 - self.crit) / 3
+        self.arg1 = self.om / abs(self.ok)
+        # roots of y**3 + y**2 - 2 crit / 27, y2 <= y3 < 0 < y1
+        y1 = (-1 + np.cos(arg0) + M_SQRT3 * np.sin(arg0)) / 3
+        y2 = (-1 - 2 * np.cos(arg0)) / 3
+        y3 = (-1 + np.cos(arg0) - M_SQRT3 * np.sin(arg0)) / 3
+        # E(z)**2 is proportional to a cubic in x = (1 + z) * arg1, 
+        # its roots are -y1 < -y3 <= -y2 in closed models and 
+        # y2 <= y3 < y1 in open models; the attributes y1 and y2 
+        # are minus the smallest and the largest root
+        if self.kap == 1:
+            self.y1, self.y2, mid = y1, y2, -y3
+        else:
+            self.y1, self.y2, mid = -y2, -y1, y3
+        self.y12 = self.y1 - self.y2
+        self.g = 2 / np.sqrt(self.y12)
+        self.k = (self.y1 + mid) / self.y12
+        self.ell0 = self._ell(self.arg1)
+
+    def _ell(self, arg):
+        # the amplitude of the elliptic integral is 
+        # arcsin(sqrt(y12 / (arg + y1)))
+        den = arg + self.y1
+        return ellipf(self.y12 / den, (arg + self.y2) / den, self.k)
+
+    def _dl(self, z):
+        ell = self._ell((1 + z) * self.arg1)
+        return (1. + z) * self.factor * sinc(self.kap, 1.0, self.g * (self.ell0 - ell))
 
 class FlrwA2_1(FlrwA2):
+    __slots__ = ()
+
     def __init__(self, matter, vacuum):
         super(FlrwA2_1, self).__init__(matter, vacuum, 2.0)
 
 class FlrwA2_2(FlrwA2):
+    __slots__ = ()
+
     def __init__(self, matter, vacuum, crit):
         super(FlrwA2_2, self).__init__(matter, vacuum, crit)
-
@@ -0,0 +1,115 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Evaluation of metrics in a pool of processes'''
+
+from __future__ import division
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+QUANTITIES = ('dc', 'dm', 'da', 'dl', 'lt', 'vol', 'age', 'hubble_function',
+              'ddc_dz', 'dvol_dz')
+
+def _threaded(metric):
+    '''Check if the methods of the metric use threads.'''
+    try:
+        from milia import _milia
+    except ImportError:
+        return False
+    return isinstance(metric, (_milia.Flrw, _milia.FlrwNat, _milia.FlrwEnsemble))
+
+def _evaluate(metric, quantity, z, rows):
+    '''Evaluate a quantity, with the redshifts along the last axis.'''
+    fun = getattr(metric, quantity)
+    if _threaded(metric):
+        # the processes already use all the cores
+        res = fun(z, num_threads=1)
+    else:
+        res = fun(z)
+    return np.reshape(res, (rows, z.size))
+
+def _work(metric, quantity, zname, outname, size, rows, start, stop):
+    '''Evaluate a chunk, reading and writing in shared memory.'''
+    zshm = shared_memory.SharedMemory(name=zname)
+    outshm = shared_memory.SharedMemory(name=outname)
+    try:
+        z = np.ndarray((size,), dtype='float', buffer=zshm.buf)
+        out = np.ndarray((rows, size), dtype='float', buffer=outshm.buf)
+        out[:, start:stop] = _evaluate(metric, quantity, z[start:stop], rows)
+        del z, out
+    finally:
+        zshm.close()
+        outshm.close()
+
+def map(metric, quantity, z, workers=None, chunk_size=None):
+    '''Evaluate a quantity of a metric in a pool of processes.
+
+    The redshifts and the results are stored in shared memory,
+    the workers receive only the metric and the limits of their
+    chunk, and write the results in place. Metrics that return several
+    values per redshift, as FlrwEnsemble, are split along the redshifts.
+
+    :param metric: the metric, of any backend, it must be picklable
+    :param quantity: one of 'dc', 'dm', 'da', 'dl', 'lt', 'vol', 'age',
+                     'hubble_function', 'ddc_dz' or 'dvol_dz'
+    :param z: redshift, array-like
+    :param workers: number of processes, by default the number of CPUs
+    :param chunk_size: number of redshifts in each task
+    :returns: array with the values of the quantity, with the shape of z,
+              after the leading axes of the metric, if any
+
+    '''
+    if quantity not in QUANTITIES:
+        raise ValueError('unknown quantity %r' % quantity)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    z = np.asarray(z, dtype='float')
+    size = z.size
+    # the leading axes of the result, from the first redshift
+    lead = np.shape(getattr(metric, quantity)(z.reshape(-1)[:1]))[:-1]
+    rows = int(np.prod(lead))
+    if size == 0:
+        return np.empty(lead + z.shape)
+    if chunk_size is None:
+        chunk_size = -(-size // workers)
+    zshm = shared_memory.SharedMemory(create=True, size=z.nbytes)
+    outshm = shared_memory.SharedMemory(create=True, size=rows * z.nbytes)
+    try:
+        zbuf = np.ndarray((size,), dtype='float', buffer=zshm.buf)
+        zbuf[:] = z.reshape(-1)
+        del zbuf
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_work, metric, quantity, zshm.name,
+                                   outshm.name, size, rows, start,
+                                   min(start + chunk_size, size))
+                       for start in range(0, size, chunk_size)]
+            for future in futures:
+                future.result()
+        out = np.ndarray((rows, size), dtype='float', buffer=outshm.buf)
+        result = out.reshape(lead + z.shape).copy()
+        del out
+    finally:
+        zshm.close()
+        zshm.unlink()
+        outshm.close()
+        outshm.unlink()
+    return result
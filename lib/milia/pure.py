@@ -20,9 +20,30 @@
 
 from __future__ import division
 
-import math
+import numpy as np
 
-from factory import FlrwNat
+from .factory import FlrwNat
+from .impl import QUANTITIES
+
+_OUTPUT_TYPES = (np.dtype(np.float64), np.dtype(np.float32))
+
+def _store(factor, value, out=None, dtype=None):
+    '''Scale a result in natural units, storing it in out if given.'''
+    if dtype is not None and np.dtype(dtype) not in _OUTPUT_TYPES:
+        raise ValueError('dtype must be float64 or float32')
+    if out is None:
+        if dtype is None:
+            return factor * value
+        return np.multiply(factor, value, dtype=dtype)
+    if not isinstance(out, np.ndarray):
+        raise TypeError('out must be a numpy array')
+    if out.dtype not in _OUTPUT_TYPES:
+        raise ValueError('out must have type float64 or float32')
+    if dtype is not None and np.dtype(dtype) != out.dtype:
+        raise ValueError('dtype and the type of out are different')
+    if out.shape != np.shape(value):
+        raise ValueError('out has shape %s, expected %s' % (out.shape, np.shape(value)))
+    return np.multiply(factor, value, out=out, casting='same_kind')
 
 class Flrw(object):
     '''The Friedmann-Lemaitre-Robertson-Walker metric
@@ -43,77 +64,248 @@ class Flrw(object):
         self.hubble_radius = 299792.458 / self.hubble
         self.hubble_time =  977.792222 / self.hubble
 
-    def age(self, z=None):
+    def age(self, z=None, out=None, dtype=None):
         '''Return the age of the Universe [Gyr].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: age of the Universe [Gyr].
 
         '''
-        return self.hubble_time * self.nat.age(z)
+        if z is None:
+            z = 0.0
+        return _store(self.hubble_time, self.nat.age(np.asarray(z, dtype='float')), 
+                      out, dtype)
 
     def angular_scale(self, z):
         '''Return the factor to transform angular sizes in pc to arc sec.
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
         :returns: factor to transform angular sizes in pc to arc sec
 
         '''
         return 0
 
-    def dc(self, z):
+    def dc(self, z, out=None, dtype=None):
         '''Return the comoving distance in the line of sight [Mpc].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving distance in the line of sight [Mpc]
         
         '''
-        return self.hubble_radius * self.nat.dc(z)
+        return _store(self.hubble_radius, self.nat.dc(np.asarray(z, dtype='float')), 
+                      out, dtype)
         
-    def dl(self, z):
+    def dl(self, z, out=None, dtype=None):
         '''Return the luminosity distance [Mpc].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: luminosity distance [Mpc]
 
         '''
-        return self.hubble_radius * self.nat.dl(z)
+        return _store(self.hubble_radius, self.nat.dl(np.asarray(z, dtype='float')), 
+                      out, dtype)
 
-    def dm(self, z):
+    def dm(self, z, out=None, dtype=None):
         '''Return the comoving distance in transverse direction [Mpc].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving distance in transverse direction [Mpc]
         
         '''
-        return self.hubble_radius * self.nat.dm(z)
+        return _store(self.hubble_radius, self.nat.dm(np.asarray(z, dtype='float')), 
+                      out, dtype)
 
-    def da(self, z):
+    def da(self, z, out=None, dtype=None):
         '''Return the angular distance [Mpc].
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: angular distance [Mpc] 
         
         '''
-        return self.hubble_radius * self.nat.da(z)
+        return _store(self.hubble_radius, self.nat.da(np.asarray(z, dtype='float')), 
+                      out, dtype)
 
-    def lt(self, z):
+    def lt(self, z, out=None, dtype=None):
         '''Return the look-back time [Gyr].
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: look-back time [Gyr]
         
         '''
-        return 0
+        return _store(self.hubble_time, self.nat.lt(np.asarray(z, dtype='float')), 
+                      out, dtype)
 
-    def vol(self, z):
+    def vol(self, z, out=None, dtype=None):
         '''Return comoving volume per solid angle [Mpc^3 sr^-1]
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving volume per solid angle [Mpc^3 sr^-1]
         
         '''
-        return self.hubble_radius * self.hubble_radius * self.hubble_radius * self.nat.vol(z)
+        return _store(self.hubble_radius**3, self.nat.vol(np.asarray(z, dtype='float')), 
+                      out, dtype)
+
+    def hubble_function(self, z, out=None, dtype=None):
+        '''Return the Hubble function E(z) = H(z) / H_0 [adimensional].
+
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: Hubble function [adimensional]
+
+        '''
+        return _store(1.0, self.nat.hubble_function(np.asarray(z, dtype='float')), 
+                      out, dtype)
+
+    def ddc_dz(self, z, out=None, dtype=None):
+        '''Return the derivative of the comoving distance [Mpc].
+
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: derivative of the comoving distance with redshift [Mpc]
+
+        '''
+        return _store(self.hubble_radius, self.nat.ddc_dz(np.asarray(z, dtype='float')), 
+                      out, dtype)
+
+    def dvol_dz(self, z, out=None, dtype=None):
+        '''Return differential comoving volume per solid angle [Mpc^3 sr^-1]
+
+        :param z: redshift, scalar or array-like
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: derivative of the comoving volume per solid angle with
+                  redshift [Mpc^3 sr^-1]
+
+        '''
+        return _store(self.hubble_radius**3, self.nat.dvol_dz(np.asarray(z, dtype='float')), 
+                      out, dtype)
+
+    def evaluate(self, z, quantities=QUANTITIES):
+        '''Return several quantities at the same redshifts.
+
+        The luminosity distance is computed once, the other 
+        distances and the volume are derived from it.
+
+        :param z: redshift, scalar or array-like
+        :param quantities: names of the methods to evaluate
+        :returns: a dictionary with the values of each quantity
+
+        '''
+        res = self.nat.evaluate(np.asarray(z, dtype='float'), quantities)
+        for q in res:
+            if q in ('vol', 'dvol_dz'):
+                res[q] = res[q] * self.hubble_radius**3
+            elif q in ('lt', 'age'):
+                res[q] = res[q] * self.hubble_time
+            elif q == 'hubble_function':
+                pass
+            else:
+                res[q] = res[q] * self.hubble_radius
+        return res
+
+    def tabulate(self, zmin, zmax, rtol=1e-8, cache=None):
+        '''Return interpolation tables of the metric.
+
+        :param zmin: lower redshift of the table
+        :param zmax: upper redshift of the table
+        :param rtol: relative tolerance of the interpolation
+        :param cache: a milia.cache.TableCache, or its directory, where
+                      the tables are stored and read, None to compute them
+        :returns: a FlrwTable, with the same methods as the metric
+
+        '''
+        if cache is not None:
+            from milia.cache import cached_table
+            return cached_table(self, zmin, zmax, rtol, cache)
+        from milia.tabulate import FlrwTable
+        return FlrwTable(self, zmin, zmax, rtol)
+
+    def stream(self, quantities, iterable, chunk_size=65536):
+        '''Evaluate quantities over a stream of redshifts.
+
+        :param quantities: name of a method, or names of several methods
+        :param iterable: iterable of redshifts, scalars or array-like
+        :param chunk_size: number of redshifts of each result
+        :returns: a generator of arrays, or of dictionaries of arrays
+
+        '''
+        from milia.stream import stream
+        return stream(self, quantities, iterable, chunk_size)
+
+    def z_at(self, quantity, values, branch='near', zmax=1e4):
+        '''Return the redshift where a quantity takes some values.
+
+        :param quantity: one of 'dc', 'dm', 'dl', 'da', 'lt', 'age' or 'vol'
+        :param values: values of the quantity, scalar or array-like
+        :param branch: branch of the solution for 'da', 'near' or 'far'
+        :param zmax: maximum redshift of the solutions
+        :returns: redshifts, NaN where the value is not reached
+
+        '''
+        from milia.inverse import z_at
+        return z_at(self, quantity, values, branch, zmax)
+
+    def dc_between(self, z1, z2):
+        '''Return the comoving distance between two redshifts [Mpc].
+
+        :param z1: redshift of the first object, scalar or array-like
+        :param z2: redshift of the second object, scalar or array-like
+        :returns: comoving distance in the line of sight, with the shape 
+                  of z1 and z2 broadcast [Mpc]
+
+        '''
+        from milia.lensing import dc_between
+        return dc_between(self, z1, z2)
+
+    def da_between(self, z1, z2):
+        '''Return the angular distance of an object at z2 seen from z1 [Mpc].
+
+        :param z1: redshift of the observer, scalar or array-like
+        :param z2: redshift of the object, scalar or array-like
+        :returns: angular distance, with the shape of z1 and z2 
+                  broadcast [Mpc]
+
+        '''
+        from milia.lensing import da_between
+        return da_between(self, z1, z2)
+
+    def jacobian(self, quantity, z, rtol=1e-10):
+        '''Return the derivatives of a quantity with respect to the parameters.
+
+        :param quantity: name of the method, 'dc', 'dm', 'da', 'dl', 'vol', 
+                         'lt', 'age', 'hubble_function', 'ddc_dz' or 'dvol_dz'
+        :param z: redshift, scalar or array-like
+        :param rtol: relative tolerance of the quadrature
+        :returns: array with the derivatives with respect to hubble, matter
+                  and vacuum along the first axis
+
+        '''
+        from milia.jacobian import jacobian
+        return jacobian(self, quantity, z, rtol)
+
+    @property
+    def matter(self):
+        return self.nat.om
+
+    @property
+    def vacuum(self):
+        return self.nat.ov
 
     def __str__(self):
         return 'milia.Flrw(hubble=%f, matter=%f, vacuum=%f)' % (self.hubble, self.nat.om, self.nat.ov)
@@ -0,0 +1,67 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Evaluation of metrics over streams of redshifts'''
+
+from __future__ import division
+
+import numpy as np
+
+# Default number of redshifts evaluated together
+CHUNK_SIZE = 65536
+
+def stream(metric, quantities, iterable, chunk_size=CHUNK_SIZE):
+    '''Evaluate quantities of a metric over a stream of redshifts.
+
+    The redshifts, scalars or arrays, are collected in a buffer of
+    fixed size, that is evaluated when full. Only one buffer is held
+    in memory, however long the stream is.
+
+    :param metric: the metric, of any backend
+    :param quantities: name of a method, or names of several methods
+    :param iterable: iterable of redshifts, scalars or array-like
+    :param chunk_size: number of redshifts of each result
+    :returns: a generator of arrays, or of dictionaries of arrays if
+              several quantities are requested
+
+    '''
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    single = isinstance(quantities, str)
+    names = (quantities,) if single else tuple(quantities)
+
+    def compute(z):
+        res = metric.evaluate(z, names)
+        if single:
+            return res[quantities]
+        return res
+
+    buf = np.empty(chunk_size, dtype='float')
+    n = 0
+    for item in iterable:
+        data = np.asarray(item, dtype='float').reshape(-1)
+        while data.size > 0:
+            k = min(chunk_size - n, data.size)
+            buf[n:n + k] = data[:k]
+            data = data[k:]
+            n += k
+            if n == chunk_size:
+                yield compute(buf)
+                n = 0
+    if n > 0:
+        yield compute(buf[:n])
@@ -0,0 +1,388 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+#
+# This file is part of PyMilia
+#
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Interpolation tables of the distances and times of a metric'''
+
+from __future__ import division
+
+import numpy as np
+
+from milia.impl import VOLUME_SERIES_LIMIT, volume_series
+
+# Initial number of intervals of the grid
+_START_INTERVALS = 16
+# The grid is not refined beyond this number of nodes
+_MAX_NODES = 1000000
+
+def metric_parameters(metric):
+    '''Return matter, vacuum, Hubble radius and Hubble time of a metric.
+
+    Metrics in natural units have Hubble radius and Hubble time equal to 1.
+
+    :param metric: a Flrw or FlrwNat object, of any backend
+    :returns: a tuple (matter, vacuum, radius, time)
+
+    '''
+    try:
+        matter, vacuum = metric.matter, metric.vacuum
+    except AttributeError:
+        # pure backend, natural units
+        matter, vacuum = metric.om, metric.ov
+    hubble = getattr(metric, 'hubble', None)
+    if hubble is None:
+        return matter, vacuum, 1.0, 1.0
+    return matter, vacuum, 299792.458 / hubble, 977.792222 / hubble
+
+def asinc(ok, x):
+    '''Comoving distance from the transverse comoving distance, natural units.'''
+    if ok > 0:
+        sq = np.sqrt(ok)
+        return np.arcsinh(sq * x) / sq
+    elif ok < 0:
+        sq = np.sqrt(-ok)
+        return np.arcsin(sq * x) / sq
+    return x
+
+def sinc(ok, x):
+    '''Transverse comoving distance from the comoving distance, natural units.'''
+    if ok > 0:
+        sq = np.sqrt(ok)
+        return np.sinh(sq * x) / sq
+    elif ok < 0:
+        sq = np.sqrt(-ok)
+        return np.sin(sq * x) / sq
+    return x
+
+def volume(ok, x):
+    '''Comoving volume from the transverse comoving distance, natural units.
+
+    The closed form loses precision when ok * x**2 is small,
+    a series expansion is used instead.
+    '''
+    x = np.asarray(x)
+    u = ok * x * x
+    with np.errstate(invalid='ignore', divide='ignore'):
+        closed = (x * np.sqrt(1 + u) - asinc(ok, x)) / (2 * ok)
+    return np.where(np.abs(u) < VOLUME_SERIES_LIMIT, volume_series(x, u), closed)
+
+def _relerr(approx, exact):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        err = np.abs(approx - exact) / np.abs(exact)
+    return np.where(approx == exact, 0.0, err)
+
+class FlrwTable(object):
+    '''Interpolation tables of a FLRW metric.
+
+    The transverse comoving distance, the look-back time and the age 
+    are tabulated in a grid in log(1 + z), and interpolated with cubic
+    Hermite polynomials, using the exact derivatives. The grid is refined
+    until the interpolation error of every quantity is below the requested
+    relative tolerance. The other distances and the volume are
+    computed from the transverse comoving distance.
+
+    The volume is included in the refinement of the grid. The attribute 
+    max_rel_error is the largest relative error of every method, the 
+    volume included, estimated at seven points of each interval of the 
+    grid. The comoving distance and the volume are compared with their
+    values computed from the exact transverse comoving distance, as in
+    the method evaluate of the metric; the method vol of a metric can 
+    differ from them by more than the tolerance near z = 0, where its 
+    closed form loses precision.
+
+    Redshifts outside [zmin, zmax] are computed with the exact metric.
+    '''
+    def __init__(self, metric, zmin, zmax, rtol=1e-8):
+        '''The constructor takes four parameters:
+
+        :param metric: the exact metric, of any backend
+        :param zmin: lower redshift of the table
+        :param zmax: upper redshift of the table
+        :param rtol: relative tolerance of the interpolation
+        :raises: ValueError if the tolerance cannot be reached
+
+        '''
+        self._setup(metric, zmin, zmax, rtol)
+        self.columns = ['dm']
+        for q in ['lt', 'age']:
+            try:
+                metric.evaluate(zmin, (q,))
+                self.columns.append(q)
+            except NotImplementedError:
+                pass
+
+        x = np.linspace(np.log1p(zmin), np.log1p(zmax), _START_INTERVALS + 1)
+        values = self._exact(x)
+        while True:
+            self._build(x, values)
+            xm = 0.5 * (x[:-1] + x[1:])
+            vm = self._exact(xm)
+            bad = self._error(xm, vm) > 0.5 * rtol
+            if not bad.any():
+                break
+            if len(x) + bad.sum() > _MAX_NODES:
+                raise ValueError('tolerance %g cannot be reached' % rtol)
+            idx = np.searchsorted(x, xm[bad])
+            x = np.insert(x, idx, xm[bad])
+            values = np.insert(values, idx, vm[:, bad], axis=1)
+
+        # Verification, at seven points of each interval, around
+        # the midpoint, where the error of the Hermite polynomials 
+        # is largest
+        h = x[1:] - x[:-1]
+        xv = np.concatenate([x[:-1] + t * h for t in np.arange(1, 8) / 8])
+        self.max_rel_error = float(self._error(xv, self._exact(xv)).max())
+
+    def _setup(self, metric, zmin, zmax, rtol):
+        if not 0 <= zmin < zmax:
+            raise ValueError('the redshift range must verify 0 <= zmin < zmax')
+        self.metric = metric
+        self.zmin = zmin
+        self.zmax = zmax
+        self.rtol = rtol
+        matter, vacuum, self.radius, self.time = metric_parameters(metric)
+        self.om = matter
+        self.ov = vacuum
+        self.ok = 1 - matter - vacuum
+
+    @classmethod
+    def from_arrays(cls, metric, zmin, zmax, rtol, columns, x, coef, 
+                    max_rel_error):
+        '''Create a table from its arrays, without computing them.
+
+        The arrays are used as they are, they can be memory-mapped.
+
+        :param metric: the exact metric, of any backend
+        :param zmin: lower redshift of the table
+        :param zmax: upper redshift of the table
+        :param rtol: relative tolerance of the interpolation
+        :param columns: names of the tabulated quantities
+        :param x: nodes of the table, in log(1 + z)
+        :param coef: coefficients of the Hermite polynomials, with
+                     shape (4, len(x) - 1), for each column
+        :param max_rel_error: maximum relative error of the table
+        :returns: a FlrwTable
+
+        '''
+        table = cls.__new__(cls)
+        table._setup(metric, zmin, zmax, rtol)
+        table.columns = list(columns)
+        table._x = x
+        table._coef = dict(zip(table.columns, coef))
+        table.max_rel_error = max_rel_error
+        return table
+
+    @property
+    def nodes(self):
+        '''Redshifts of the nodes of the table.'''
+        return np.expm1(self._x)
+
+    def _exact(self, x):
+        z = np.expm1(x)
+        res = self.metric.evaluate(z, self.columns)
+        return np.array([res[q] + np.zeros_like(z) for q in self.columns])
+
+    def _error(self, x, values):
+        '''Maximum relative error of the interpolated quantities.'''
+        ok = self.ok
+        dm = values[0]
+        dmi = self._interp('dm', x)
+        xe = dm / self.radius
+        xi = dmi / self.radius
+        err = np.maximum(_relerr(dmi, dm), _relerr(asinc(ok, xi), asinc(ok, xe)))
+        err = np.maximum(err, _relerr(volume(ok, xi), volume(ok, xe)))
+        for q, val in zip(self.columns[1:], values[1:]):
+            err = np.maximum(err, _relerr(self._interp(q, x), val))
+        return err
+
+    def _build(self, x, values):
+        '''Compute the coefficients of the Hermite polynomials.'''
+        a = np.exp(x)
+        efun = np.sqrt(self.om * a**3 + self.ok * a * a + self.ov)
+        # derivatives with respect to log(1 + z)
+        deriv = {'lt': self.time / efun, 'age': -self.time / efun}
+        xn = values[0] / self.radius
+        deriv['dm'] = a * self.radius * np.sqrt(1 + self.ok * xn * xn) / efun
+        self._x = x
+        self._coef = {}
+        for q, val in zip(self.columns, values):
+            self._coef[q] = self._coefficients(x, val, deriv[q])
+
+    @staticmethod
+    def _coefficients(x, y, m):
+        h = x[1:] - x[:-1]
+        y0, y1 = y[:-1], y[1:]
+        m0, m1 = h * m[:-1], h * m[1:]
+        return np.array([y0, m0, 3 * (y1 - y0) - 2 * m0 - m1, 2 * (y0 - y1) + m0 + m1])
+
+    def _efun(self, z):
+        a = 1 + z
+        return np.sqrt(a * a * (self.om * a + self.ok) + self.ov)
+
+    def _interp(self, quantity, x):
+        i = np.searchsorted(self._x, x, side='right') - 1
+        i = np.clip(i, 0, len(self._x) - 2)
+        t = (x - self._x[i]) / (self._x[i + 1] - self._x[i])
+        c = self._coef[quantity][:, i]
+        return c[0] + t * (c[1] + t * (c[2] + t * c[3]))
+
+    def _map(self, quantity, z):
+        z = np.asarray(z, dtype='float')
+        inside = (z >= self.zmin) & (z <= self.zmax)
+        if quantity in ('lt', 'age') and quantity not in self.columns:
+            inside[...] = False
+        if inside.all():
+            res = self._compute(quantity, z)
+        else:
+            res = np.empty(z.shape)
+            if inside.any():
+                res[inside] = self._compute(quantity, z[inside])
+            outside = ~inside
+            res[outside] = getattr(self.metric, quantity)(z[outside])
+        if res.ndim == 0:
+            return float(res)
+        return res
+
+    def _compute(self, quantity, z):
+        x = np.log1p(z)
+        if quantity in ('lt', 'age'):
+            return self._interp(quantity, x)
+        if quantity == 'hubble_function':
+            return self._efun(z)
+        elif quantity == 'ddc_dz':
+            return self.radius / self._efun(z)
+        dm = self._interp('dm', x)
+        if quantity == 'dm':
+            return dm
+        elif quantity == 'dl':
+            return (1 + z) * dm
+        elif quantity == 'da':
+            return dm / (1 + z)
+        elif quantity == 'dc':
+            return self.radius * asinc(self.ok, dm / self.radius)
+        elif quantity == 'vol':
+            return self.radius**3 * volume(self.ok, dm / self.radius)
+        elif quantity == 'dvol_dz':
+            return dm * dm * self.radius / self._efun(z)
+        raise ValueError('unknown quantity %r' % quantity)
+
+    def age(self, z=None):
+        '''Return the age of the Universe.
+
+        :param z: redshift, scalar or array-like
+        :returns: age of the Universe
+
+        '''
+        if z is None:
+            z = 0.0
+        return self._map('age', z)
+
+    def dc(self, z):
+        '''Return the comoving distance in the line of sight.
+
+        :param z: redshift, scalar or array-like
+        :returns: comoving distance in the line of sight
+
+        '''
+        return self._map('dc', z)
+
+    def dl(self, z):
+        '''Return the luminosity distance.
+
+        :param z: redshift, scalar or array-like
+        :returns: luminosity distance
+
+        '''
+        return self._map('dl', z)
+
+    def dm(self, z):
+        '''Return the comoving distance in transverse direction.
+
+        :param z: redshift, scalar or array-like
+        :returns: comoving distance in transverse direction
+
+        '''
+        return self._map('dm', z)
+
+    def da(self, z):
+        '''Return the angular distance.
+
+        :param z: redshift, scalar or array-like
+        :returns: angular distance
+
+        '''
+        return self._map('da', z)
+
+    def lt(self, z):
+        '''Return the look-back time.
+
+        :param z: redshift, scalar or array-like
+        :returns: look-back time
+
+        '''
+        return self._map('lt', z)
+
+    def vol(self, z):
+        '''Return comoving volume per solid angle.
+
+        :param z: redshift, scalar or array-like
+        :returns: comoving volume per solid angle
+
+        '''
+        return self._map('vol', z)
+
+    def hubble_function(self, z):
+        '''Return the Hubble function E(z) = H(z) / H_0.
+
+        :param z: redshift, scalar or array-like
+        :returns: Hubble function
+
+        '''
+        return self._map('hubble_function', z)
+
+    def ddc_dz(self, z):
+        '''Return the derivative of the comoving distance.
+
+        :param z: redshift, scalar or array-like
+        :returns: derivative of the comoving distance with redshift
+
+        '''
+        return self._map('ddc_dz', z)
+
+    def dvol_dz(self, z):
+        '''Return differential comoving volume per solid angle.
+
+        :param z: redshift, scalar or array-like
+        :returns: derivative of the comoving volume per solid angle 
+                  with redshift
+
+        '''
+        return self._map('dvol_dz', z)
+
+    def evaluate(self, z, quantities=('dc', 'dm', 'da', 'dl', 'vol', 'lt')):
+        '''Return several quantities at the same redshifts.
+
+        :param z: redshift, scalar or array-like
+        :param quantities: names of the methods to evaluate
+        :returns: a dictionary with the values of each quantity
+
+        '''
+        return dict((q, self._map(q, z)) for q in quantities)
+
+    def __str__(self):
+        return 'milia.FlrwTable(%s, zmin=%g, zmax=%g, rtol=%g)' % (self.metric,
+            self.zmin, self.zmax, self.rtol)
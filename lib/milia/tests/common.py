@@ -0,0 +1,111 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Tests shared by the backends'''
+
+import numpy
+
+from milia.tests import isclose, model
+
+class MetricTests(object):
+    '''Tests of the metrics of a backend.
+
+    The test cases derive from this class and unittest.TestCase,
+    and set Flrw to the class of the backend.
+    '''
+    Flrw = None
+
+    def test_evaluate(self):
+        quantities = ('dc', 'dm', 'da', 'dl', 'vol')
+        for param, checktup in model['lum']:
+            mm = self.Flrw(*param)
+            zz = numpy.array([z for _, z, _ in checktup])
+            res = mm.evaluate(zz, quantities)
+            self.assertEqual(list(res), list(quantities))
+            for q in quantities:
+                for r, e in zip(res[q], getattr(mm, q)(zz)):
+                    self.assertTrue(isclose(r, e))
+        self.assertRaises(ValueError, mm.evaluate, zz, ('dx',))
+        # scalar redshift
+        res = mm.evaluate(1.0, quantities)
+        for q in quantities:
+            self.assertIsInstance(res[q], float)
+            self.assertTrue(isclose(res[q], getattr(mm, q)(1.0)))
+        # nearly flat metrics
+        zz = numpy.array([0.1, 10.0])
+        for param in [(70., 0.7, 0.3), (70., 0.3, 0.7 - 1e-9), (70., 0.3, 0.7 + 1e-9)]:
+            mm = self.Flrw(*param)
+            res = mm.evaluate(zz, ('vol', 'dc', 'dm'))
+            self.assertTrue(numpy.allclose(res['vol'], res['dm']**3 / 3, rtol=1e-8, atol=0))
+            self.assertFalse(numpy.shares_memory(res['dc'], res['dm']))
+
+    def test_differential(self):
+        zz = numpy.array([0.01, 0.1, 1.0, 3.0, 10.0])
+        h = 1e-4 * zz
+        for param, _ in model['lum']:
+            mm = self.Flrw(*param)
+            hubble, matter, vacuum = param
+            a = 1 + zz
+            efun = numpy.sqrt(matter * a**3 + (1 - matter - vacuum) * a * a + vacuum)
+            self.assertTrue(numpy.allclose(mm.hubble_function(zz), efun, rtol=1e-12))
+            ddc = (mm.dc(zz + h) - mm.dc(zz - h)) / (2 * h)
+            self.assertTrue(numpy.allclose(mm.ddc_dz(zz), ddc, rtol=1e-6))
+            dvol = (mm.vol(zz + h) - mm.vol(zz - h)) / (2 * h)
+            self.assertTrue(numpy.allclose(mm.dvol_dz(zz), dvol, rtol=1e-6))
+            res = mm.evaluate(zz, ('dvol_dz', 'ddc_dz', 'hubble_function'))
+            for q in res:
+                self.assertTrue(numpy.allclose(res[q], getattr(mm, q)(zz), rtol=1e-12))
+
+    def test_stream(self):
+        param, _ = model['lum'][0]
+        mm = self.Flrw(*param)
+        zz = numpy.linspace(0, 5, 250)
+        source = [zz[:3], zz[3]] + [zz[i:i + 41] for i in range(4, 250, 41)]
+        chunks = list(mm.stream('dl', iter(source), chunk_size=100))
+        self.assertEqual([len(c) for c in chunks], [100, 100, 50])
+        for r, e in zip(numpy.concatenate(chunks), mm.dl(zz)):
+            self.assertTrue(isclose(r, e))
+        chunks = list(mm.stream(('dl', 'dc'), iter(source), chunk_size=100))
+        self.assertEqual(len(chunks), 3)
+        for r, e in zip(numpy.concatenate([c['dc'] for c in chunks]), mm.dc(zz)):
+            self.assertTrue(isclose(r, e))
+        self.assertEqual(list(mm.stream('dl', iter([]))), [])
+
+    def test_output(self):
+        param, _ = model['lum'][0]
+        mm = self.Flrw(*param)
+        zz = numpy.linspace(0, 5, 11)
+        table = numpy.zeros(len(zz), dtype=[('id', 'i4'), ('dl', 'f8'), ('dc', 'f4')])
+        for method in ['dc', 'dm', 'da', 'dl', 'vol']:
+            fun = getattr(mm, method)
+            ref = fun(zz)
+            out = numpy.empty_like(zz)
+            res = fun(zz, out=out)
+            self.assertIs(res, out)
+            self.assertTrue(numpy.all(out == ref))
+            res = fun(zz, dtype=numpy.float32)
+            self.assertEqual(res.dtype, numpy.float32)
+            self.assertTrue(numpy.allclose(res, ref, rtol=1e-6))
+        mm.dl(zz, out=table['dl'])
+        mm.dc(zz, out=table['dc'])
+        self.assertTrue(numpy.all(table['dl'] == mm.dl(zz)))
+        self.assertTrue(numpy.allclose(table['dc'], mm.dc(zz), rtol=1e-6))
+        self.assertTrue(numpy.all(table['id'] == 0))
+        self.assertRaises(ValueError, mm.dl, zz, out=numpy.empty(3))
+        self.assertRaises(ValueError, mm.dl, zz, dtype=numpy.int32)
+        self.assertRaises(TypeError, mm.dl, zz, out=list(zz))
@@ -0,0 +1,77 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import subprocess
+import sys
+import unittest
+
+import milia
+from milia import pure, factory
+from milia.tests import isclose
+
+class BackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = milia.get_backend()
+
+    def tearDown(self):
+        milia.set_backend(self.previous)
+
+    def test_auto(self):
+        name = milia.set_backend('auto')
+        self.assertEqual(name, milia.available_backends()[0])
+        self.assertEqual(milia.capabilities()['backend'], name)
+
+    def test_pure(self):
+        for name in ['pure', 'numpy']:
+            self.assertEqual(milia.set_backend(name), 'pure')
+            self.assertIs(milia.Flrw, pure.Flrw)
+            self.assertIs(milia.Metric, pure.Flrw)
+            self.assertIs(milia.FlrwNat, factory.FlrwNat)
+            self.assertFalse(milia.capabilities()['nogil'])
+            self.assertRaises(AttributeError, getattr, milia, 'FlrwEnsemble')
+
+    def test_context(self):
+        previous = milia.get_backend()
+        with milia.backend('pure') as name:
+            self.assertEqual(name, 'pure')
+            mm = milia.Flrw(70, 0.3, 0.7)
+            self.assertIsInstance(mm, pure.Flrw)
+        self.assertEqual(milia.get_backend(), previous)
+        self.assertTrue(isclose(milia.Flrw(70, 0.3, 0.7).dl(1.0), mm.dl(1.0)))
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, milia.set_backend, 'fortran')
+
+    def test_fallback(self):
+        # the compiled extension is made unimportable
+        code = ('import sys; sys.modules["milia._milia"] = None; '
+                'import milia; print(milia.get_backend()); '
+                'print(milia.Flrw(70, 0.3, 0.7).dl(1.0) > 0)')
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        self.assertEqual(out.split(), [b'pure', b'True'])
+
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(BackendTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
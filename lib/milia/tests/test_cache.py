@@ -0,0 +1,96 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from milia.pure import Flrw
+from milia.factory import FlrwNat
+from milia.cache import TableCache, table_key
+
+class TableCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_roundtrip(self):
+        zz = numpy.linspace(0.01, 5, 101)
+        for mm in [Flrw(70., 0.3, 0.7), FlrwNat(0.3, 0.2)]:
+            cache = TableCache(self.directory)
+            first = mm.tabulate(0, 5, 1e-8, cache=cache)
+            self.assertTrue(os.path.exists(cache.path(mm, 0, 5, 1e-8)))
+            second = mm.tabulate(0, 5, 1e-8, cache=self.directory)
+            self.assertIsInstance(second._x, numpy.memmap)
+            exact = mm.tabulate(0, 5, 1e-8)
+            self.assertEqual(second.columns, exact.columns)
+            for method in ['dc', 'dm', 'dl', 'vol', 'lt']:
+                self.assertTrue(numpy.all(getattr(first, method)(zz) == 
+                                          getattr(exact, method)(zz)))
+                self.assertTrue(numpy.all(getattr(second, method)(zz) == 
+                                          getattr(exact, method)(zz)))
+
+    def test_key(self):
+        mm = Flrw(70., 0.3, 0.7)
+        key = table_key(mm, 0, 5, 1e-8)
+        self.assertEqual(key, table_key(Flrw(70., 0.3, 0.7), 0, 5, 1e-8))
+        self.assertNotEqual(key, table_key(mm, 0, 5, 1e-6))
+        self.assertNotEqual(key, table_key(Flrw(70., 0.3, 0.69), 0, 5, 1e-8))
+        self.assertNotEqual(key, table_key(FlrwNat(0.3, 0.7), 0, 5, 1e-8))
+
+    def test_corrupt(self):
+        mm = Flrw(70., 0.3, 0.7)
+        cache = TableCache(self.directory)
+        with open(cache.path(mm, 0, 5), 'wb') as fobj:
+            fobj.write(b'garbage')
+        table = cache.get(mm, 0, 5)
+        self.assertAlmostEqual(table.dl(1.0) / mm.dl(1.0), 1, 7)
+        self.assertIsInstance(cache.get(mm, 0, 5)._x, numpy.memmap)
+
+    def test_eviction(self):
+        cache = TableCache(self.directory, max_size=None)
+        metrics = [Flrw(70., matter, 0.7) for matter in (0.2, 0.25, 0.3)]
+        for k, mm in enumerate(metrics):
+            cache.get(mm, 0, 5)
+            os.utime(cache.path(mm, 0, 5), (k, k))
+        # the first is used again
+        cache.get(metrics[0], 0, 5)
+        self.assertEqual(cache.files()[-1], cache.path(metrics[0], 0, 5))
+        size = cache.size()
+        cache.max_size = size - 1
+        cache.evict()
+        self.assertFalse(os.path.exists(cache.path(metrics[1], 0, 5)))
+        self.assertTrue(os.path.exists(cache.path(metrics[0], 0, 5)))
+        self.assertTrue(cache.size() <= cache.max_size)
+        cache.clear()
+        self.assertEqual(cache.files(), [])
+    
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TableCacheTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -18,7 +18,11 @@
 
 import unittest
 
-from milia.factory import FlrwNat
+import numpy
+
+from milia.factory import FlrwNat, BRANCHES, classify, evaluate
+from milia.impl import integrate
+from milia.nonflatmodels import FlrwA2_1, FlrwA2_2
 from milia.tests import isclose
 from milia.tests import model_nat as model
 
@@ -48,7 +52,6 @@ class FlrwNatTest(unittest.TestCase):
             for d, z, _tol in checktup:                
                 self.assertTrue(isclose(mm.dc(z), d))
     
-    @unittest.skip("not implemented yet")
     def test_age(self):
         for param, checktup in model['age']:
             mm = FlrwNat(*param)
@@ -56,11 +59,85 @@ class FlrwNatTest(unittest.TestCase):
                 self.assertTrue(isclose(mm.age(z), d))
                 
     
+    def test_look_back_time(self):
+        for param, checktup in model['age']:
+            mm = FlrwNat(*param)
+            age0 = mm.age(0.0)
+            for _d, z, _tol in checktup:
+                self.assertTrue(isclose(mm.lt(z), age0 - mm.age(z)))
+            zz = numpy.array([z for _, z, _ in checktup])
+            res = mm.lt(zz)
+            self.assertEqual(res.shape, zz.shape)
+
     def test_comoving_volume(self):
         for param, checktup in model['vol']:
             mm = FlrwNat(*param)
             for d, z, _tol in checktup:
                 self.assertTrue(isclose(mm.vol(z), d))
+
+    def test_array_input(self):
+        for param, checktup in model['lum']:
+            mm = FlrwNat(*param)
+            zz = numpy.array([z for _, z, _ in checktup])
+            for method in ['dc', 'dm', 'da', 'dl', 'vol']:
+                fun = getattr(mm, method)
+                res = fun(zz)
+                self.assertIsInstance(res, numpy.ndarray)
+                self.assertEqual(res.shape, zz.shape)
+                for r, z in zip(res, zz):
+                    self.assertTrue(isclose(r, fun(z)))
+                res = fun(zz.reshape(-1, 1))
+                self.assertEqual(res.shape, (len(zz), 1))
+
+    def test_compiled(self):
+        for param, _ in model['lum']:
+            mm = FlrwNat(*param)
+            self.assertFalse(hasattr(mm, '__dict__'))
+
+    def test_classify(self):
+        matter = numpy.linspace(0, 2, 21)
+        vacuum = numpy.linspace(-0.5, 1.5, 21)
+        mm, vv = numpy.meshgrid(matter, vacuum)
+        branches = classify(mm, vv)
+        self.assertEqual(branches.shape, mm.shape)
+        for m, v, b in zip(mm.flat, vv.flat, branches.flat):
+            self.assertIs(type(FlrwNat(m, v)), BRANCHES[b])
+
+    def test_evaluate_parameters(self):
+        params = [param for param, _ in model['lum']]
+        matter = numpy.array([m for m, _ in params])
+        vacuum = numpy.array([v for _, v in params])
+        zz = numpy.array([0.1, 1.0, 3.0])
+        for method in ['dc', 'dm', 'da', 'dl', 'vol']:
+            res = evaluate(matter, vacuum, method, zz)
+            self.assertEqual(res.shape, (len(params), len(zz)))
+            for param, row in zip(params, res):
+                ref = getattr(FlrwNat(*param), method)(zz)
+                for r, d in zip(row, ref):
+                    self.assertTrue(isclose(r, d))
+
+    def test_a2(self):
+        # no reference tables, compared with the distances by quadrature
+        zz = numpy.array([0.01, 0.5, 3.0, 100.0])
+        for param, cls in [((0.5, -0.25), FlrwA2_1), ((0.5, -0.1), FlrwA2_2), 
+                           ((0.3, -0.05), FlrwA2_2), ((3.0, 0.1), FlrwA2_2)]:
+            mm = FlrwNat(*param)
+            self.assertIs(type(mm), cls)
+            matter, vacuum = param
+            ok = 1 - matter - vacuum
+            gfun = lambda u: matter + u * u * (ok + vacuum * u**4)
+            for z, dl, dc in zip(zz, mm.dl(zz), mm.dc(zz)):
+                chi = integrate(lambda u: 2 / numpy.sqrt(gfun(u)), 
+                                1 / numpy.sqrt(1 + z), 1.0, rtol=1e-14)
+                sq = numpy.sqrt(abs(ok))
+                if ok > 0:
+                    dm = numpy.sinh(sq * chi) / sq
+                else:
+                    # folded beyond the equator, as in the metrics
+                    dm = numpy.sin(sq * chi) / sq
+                    chi = numpy.arcsin(sq * dm) / sq
+                self.assertTrue(isclose(dl, (1 + z) * dm, 1e-12, 0))
+                self.assertTrue(isclose(dc, chi, 1e-12, 0))
     
 def test_suite():
     suite = unittest.TestSuite()
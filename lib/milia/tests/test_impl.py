@@ -0,0 +1,127 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import math
+import unittest
+
+import numpy
+
+from milia.impl import carlson_rf, ellipk, ellipf, ellipf_acos, integrate
+from milia.impl import distance_series, inverse_sqrt_series
+from milia.factory import FlrwNat
+from milia.tests import isclose
+
+class EllipticTest(unittest.TestCase):
+
+    def test_carlson_rf(self):
+        # values from Carlson (1995), Numerical Algorithms 10, 13
+        checks = [((1.0, 2.0, 0.0), 1.3110287771461), 
+                  ((2.0, 3.0, 4.0), 0.58408284167715),
+                  ((0.5, 1.0, 0.0), 1.8540746773014)]
+        for args, value in checks:
+            self.assertTrue(isclose(carlson_rf(*args), value, rtol=1e-12))
+        xx = numpy.array([args[0] for args, _ in checks])
+        yy = numpy.array([args[1] for args, _ in checks])
+        zz = numpy.array([args[2] for args, _ in checks])
+        res = carlson_rf(xx, yy, zz)
+        for r, x, y, z in zip(res, xx, yy, zz):
+            self.assertEqual(r, carlson_rf(x, y, z))
+        self.assertTrue(math.isnan(carlson_rf(-1.0, 1.0, 1.0)))
+
+    def test_elliptic_first_kind(self):
+        mm = numpy.array([0.0, 0.5, 0.9])
+        self.assertTrue(numpy.allclose(ellipk(mm[0]), 0.5 * math.pi))
+        self.assertTrue(isclose(ellipk(mm[1]), 1.8540746773014, rtol=1e-12))
+        # F(pi/2|m) = K(m), F(pi|m) = 2 K(m)
+        self.assertTrue(numpy.allclose(ellipf(1.0, 0.0, mm), ellipk(mm)))
+        self.assertTrue(numpy.allclose(ellipf_acos(-1.0, 2.0, mm), 2 * ellipk(mm)))
+        # F(phi|0) = phi
+        phi = numpy.linspace(0, math.pi, 7)
+        res = ellipf_acos(numpy.cos(phi), 2 * numpy.sin(0.5 * phi)**2, 0.0)
+        self.assertTrue(numpy.allclose(res, phi, rtol=1e-14, atol=0))
+
+class QuadratureTest(unittest.TestCase):
+
+    def test_integrate(self):
+        hi = numpy.linspace(0, 1, 5)
+        res = integrate(lambda u: numpy.cos(u), 0.0, hi, rtol=1e-12)
+        self.assertEqual(res.shape, hi.shape)
+        self.assertTrue(numpy.allclose(res, numpy.sin(hi), rtol=1e-12, atol=0))
+
+class SeriesTest(unittest.TestCase):
+
+    params = [(0.3, 0.7), (0.3, 0.0), (1.5, 0.0), (0.0, 0.5), (1.0, 0.0), 
+              (0.3, 0.2), (0.25, 0.25)]
+
+    def test_inverse_sqrt(self):
+        # 1 / sqrt(1 + x)
+        coef = inverse_sqrt_series((1.0, 1.0), 6)
+        expected = [1, -1 / 2, 3 / 8, -5 / 16, 35 / 128, -63 / 256]
+        self.assertTrue(numpy.allclose(coef, expected, rtol=1e-15, atol=0))
+
+    def test_low_redshift(self):
+        for param in self.params:
+            mm = FlrwNat(*param)
+            zlow = distance_series(*param)[0]
+            ok = 1 - param[0] - param[1]
+            efun = lambda x: numpy.sqrt((1 + x)**2 * (param[0] * (1 + x) + ok) + param[1])
+            for z in [1e-3, 0.05, 0.99 * zlow]:
+                dc = integrate(lambda x: 1 / efun(x), 0.0, z, rtol=1e-15)
+                self.assertAlmostEqual(mm.dc(z) / dc, 1, 14)
+
+    def test_high_redshift(self):
+        for param in self.params[:3] + [(0.3, 1.7)]:
+            mm = FlrwNat(*param)
+            zhigh = distance_series(*param)[2]
+            ok = 1 - param[0] - param[1]
+            gfun = lambda u: param[0] + u * u * (ok + param[1] * u**4)
+            for z in [1.01 * zhigh, 1e3]:
+                dc = integrate(lambda u: 2 / numpy.sqrt(gfun(u)), 
+                               1 / numpy.sqrt(1 + z), 1.0, rtol=1e-15)
+                dm = mm._dm(dc)
+                self.assertAlmostEqual(mm.dm(z) / dm, 1, 13)
+
+    def test_continuity(self):
+        eps = 1e-12
+        for param in self.params:
+            mm = FlrwNat(*param)
+            zlow, _, zhigh, _ = distance_series(*param)
+            for z in [zlow, zhigh]:
+                if numpy.isfinite(z) and z > 0:
+                    below, above = mm.dl(z * (1 - eps)), mm.dl(z * (1 + eps))
+                    self.assertAlmostEqual(above / below, 1, 11)
+            zz = numpy.array([0.5 * zlow, 2.0, 1e3])
+            with numpy.errstate(all='raise'):
+                res = mm.dl(zz)
+            for z, r in zip(zz, res):
+                self.assertEqual(mm.dl(z), r)
+
+    def test_no_big_bang(self):
+        self.assertEqual(distance_series(0.3, 2.5)[2:], (numpy.inf, None))
+        self.assertEqual(distance_series(0.0, 0.5)[2:], (numpy.inf, None))
+        self.assertTrue(numpy.isfinite(distance_series(0.3, 1.7)[2]))
+
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(EllipticTest))
+    suite.addTest(unittest.makeSuite(QuadratureTest))
+    suite.addTest(unittest.makeSuite(SeriesTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -0,0 +1,74 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+import numpy
+
+from milia import instrument
+from milia.pure import Flrw
+from milia.factory import FlrwNat
+from milia import flatmodels
+
+class InstrumentTest(unittest.TestCase):
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_counters(self):
+        mm = Flrw(70, 0.3, 0.7)
+        instrument.enable()
+        self.assertTrue(instrument.enabled())
+        # away from the series expansions of dl
+        zz = numpy.linspace(0.5, 3, 10)
+        mm.dl(zz)
+        mm.dl(1.0)
+        res = instrument.report()
+        records = dict(((r['class'], r['model'], r['method']), r) 
+                       for r in res['methods'])
+        rec = records['Flrw', 'Flrw_OM_OV_1', 'dl']
+        self.assertEqual(rec['calls'], 2)
+        self.assertEqual(rec['elements'], 11)
+        self.assertTrue(rec['time'] >= 0)
+        rec = records['FlrwNat', 'Flrw_OM_OV_1', 'dl']
+        self.assertEqual(rec['calls'], 2)
+        self.assertEqual(res['elliptic']['elements'], 11)
+        instrument.reset()
+        self.assertEqual(instrument.report()['methods'], [])
+
+    def test_disable(self):
+        original = flatmodels.Flrw_OM_OV_1.dl
+        ellipf = flatmodels.ellipf_acos
+        instrument.enable()
+        self.assertIsNot(flatmodels.Flrw_OM_OV_1.dl, original)
+        instrument.disable()
+        self.assertFalse(instrument.enabled())
+        self.assertIs(flatmodels.Flrw_OM_OV_1.dl, original)
+        self.assertIs(flatmodels.ellipf_acos, ellipf)
+        self.assertNotIn('dc', flatmodels.Flrw_OM_OV_1.__dict__)
+        FlrwNat(0.3, 0.7).dl(1.0)
+        self.assertEqual(instrument.report()['methods'], [])
+
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(InstrumentTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
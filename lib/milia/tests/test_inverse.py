@@ -0,0 +1,68 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+import numpy
+
+from milia.pure import Flrw
+from milia.factory import FlrwNat
+from milia.tests import isclose
+
+class ZAtTest(unittest.TestCase):
+
+    def test_monotonic(self):
+        zz = numpy.array([0.001, 0.1, 1, 3, 10, 100])
+        for mm in [Flrw(70., 0.3, 0.7), FlrwNat(0.5, 0.6), FlrwNat(0.0, 0.5)]:
+            for method in ['dc', 'dm', 'dl', 'vol']:
+                res = mm.z_at(method, getattr(mm, method)(zz))
+                self.assertEqual(res.shape, zz.shape)
+                for r, z in zip(res, zz):
+                    self.assertTrue(isclose(r, z, rtol=1e-10))
+
+    def test_age(self):
+        zz = numpy.array([0.001, 0.1, 1, 3, 10, 100])
+        for mm in [Flrw(70., 0.3, 0.7), FlrwNat(0.0, 0.5)]:
+            res = mm.z_at('age', mm.age(zz))
+            for r, z in zip(res, zz):
+                self.assertTrue(isclose(r, z, rtol=1e-10))
+
+    def test_angular_distance(self):
+        mm = Flrw(70., 0.3, 0.7)
+        near = numpy.array([0.1, 0.5, 1.0])
+        far = numpy.array([3., 10., 100.])
+        for z, r in zip(near, mm.z_at('da', mm.da(near))):
+            self.assertTrue(isclose(r, z, rtol=1e-10))
+        for z, r in zip(far, mm.z_at('da', mm.da(far), branch='far')):
+            self.assertTrue(isclose(r, z, rtol=1e-10))
+
+    def test_unreachable(self):
+        mm = Flrw(50., 1.0, 0.)
+        # The comoving distance of Einstein-de Sitter is bounded
+        self.assertTrue(numpy.isnan(mm.z_at('dc', 2 * 299792.458 / 50.)))
+        self.assertTrue(numpy.isnan(mm.z_at('dc', -1.0)))
+        self.assertEqual(mm.z_at('dc', 0.0), 0.0)
+        self.assertRaises(ValueError, mm.z_at, 'dx', 1.0)
+    
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(ZAtTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
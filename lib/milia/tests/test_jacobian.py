@@ -0,0 +1,110 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+
+import numpy
+
+from milia.pure import Flrw
+from milia.factory import FlrwNat
+from milia.impl import integrate
+
+class JacobianTest(unittest.TestCase):
+
+    zz = numpy.array([0.1, 1, 3, 10, 100])
+
+    def finite_differences(self, cls, param, quantity, eps=1e-6):
+        res = []
+        for k in range(len(param)):
+            step = eps * max(1, param[k])
+            up = list(param)
+            down = list(param)
+            up[k] += step
+            down[k] -= step
+            res.append((getattr(cls(*up), quantity)(self.zz) - 
+                        getattr(cls(*down), quantity)(self.zz)) / (2 * step))
+        return numpy.array(res)
+
+    def test_finite_differences(self):
+        quantities = ['dc', 'dm', 'da', 'dl', 'vol', 'lt', 'age', 
+                      'hubble_function', 'ddc_dz', 'dvol_dz']
+        for param in [(70., 0.3, 0.7), (70., 0.3, 0.2), (70., 1.5, 0.007), 
+                      (70., 0.3, 0.1)]:
+            mm = Flrw(*param)
+            for quantity in quantities:
+                res = mm.jacobian(quantity, self.zz)
+                self.assertEqual(res.shape, (3,) + self.zz.shape)
+                ref = self.finite_differences(Flrw, param, quantity)
+                scale = numpy.abs(res).max(axis=0)
+                self.assertTrue(numpy.all(numpy.abs(res - ref) <= 1e-4 * scale))
+
+    def test_closed(self):
+        # beyond sqrt(-ok) * dc = pi / 2, compared with the distances
+        # computed by quadrature, the comoving distance folded by the 
+        # inverse of sin, as in the metrics
+        def distances(matter, vacuum, z):
+            ok = 1 - matter - vacuum
+            sq = numpy.sqrt(-ok)
+            gfun = lambda u: matter + u * u * (ok + vacuum * u**4)
+            chi = integrate(lambda u: 2 / numpy.sqrt(gfun(u)), 
+                            1 / numpy.sqrt(1 + z), 1.0, rtol=1e-14)
+            dm = numpy.sin(sq * chi) / sq
+            vol = (dm * numpy.cos(sq * chi) - chi) / (2 * ok)
+            return {'dc': numpy.arcsin(sq * dm) / sq, 'dm': dm, 
+                    'dl': (1 + z) * dm, 'da': dm / (1 + z), 'vol': vol}
+
+        eps = 1e-6
+        for param, z in [((3.0, 0.1), 100.0), ((5.0, 0.0), 10.0)]:
+            mm = FlrwNat(*param)
+            zz = numpy.array([0.5, z])
+            for k in range(2):
+                up = list(param)
+                down = list(param)
+                up[k] += eps
+                down[k] -= eps
+                hi, lo = distances(*(up + [zz])), distances(*(down + [zz]))
+                for quantity in hi:
+                    ref = (hi[quantity] - lo[quantity]) / (2 * eps)
+                    res = mm.jacobian(quantity, zz)[k]
+                    self.assertTrue(numpy.allclose(res, ref, rtol=1e-5))
+
+    def test_natural_units(self):
+        mm = FlrwNat(0.3, 0.2)
+        res = mm.jacobian('dl', self.zz)
+        self.assertEqual(res.shape, (2,) + self.zz.shape)
+        ref = self.finite_differences(FlrwNat, (0.3, 0.2), 'dl')
+        self.assertTrue(numpy.allclose(res, ref, rtol=1e-4))
+        self.assertEqual(mm.jacobian('dc', 1.0).shape, (2,))
+
+    def test_hubble(self):
+        mm = Flrw(70., 0.3, 0.7)
+        self.assertTrue(numpy.allclose(mm.jacobian('dl', self.zz)[0], 
+                                       -mm.dl(self.zz) / 70., rtol=1e-12))
+        self.assertTrue(numpy.allclose(mm.jacobian('vol', self.zz)[0], 
+                                       -3 * mm.vol(self.zz) / 70., rtol=1e-10))
+        self.assertTrue(numpy.all(mm.jacobian('hubble_function', self.zz)[0] == 0))
+        self.assertRaises(ValueError, mm.jacobian, 'dx', self.zz)
+    
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(JacobianTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
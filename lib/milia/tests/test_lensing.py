@@ -0,0 +1,72 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+import unittest
+
+import numpy
+
+from milia.pure import Flrw
+from milia.factory import FlrwNat
+from milia import lensing
+
+class BetweenTest(unittest.TestCase):
+
+    zz = numpy.array([0.1, 0.5, 1, 3, 10])
+
+    def test_from_observer(self):
+        for mm in [Flrw(70., 0.3, 0.7), Flrw(70., 0.3, 0.2), Flrw(70., 1.5, 0.007),
+                   FlrwNat(0.3, 0.2)]:
+            self.assertTrue(numpy.allclose(mm.dc_between(0, self.zz), mm.dc(self.zz), 
+                                           rtol=1e-12))
+            self.assertTrue(numpy.allclose(mm.da_between(0, self.zz), mm.da(self.zz), 
+                                           rtol=1e-10))
+            self.assertTrue(numpy.allclose(lensing.dm_between(mm, 0, self.zz), 
+                                           mm.dm(self.zz), rtol=1e-10))
+
+    def test_addition(self):
+        z1, z2 = 0.5, 2.0
+        for mm in [Flrw(70., 0.3, 0.7), Flrw(70., 0.3, 0.2), Flrw(70., 1.5, 0.007)]:
+            ok = 1 - mm.matter - mm.vacuum
+            radius = 299792.458 / mm.hubble
+            dm1, dm2 = mm.dm(z1), mm.dm(z2)
+            dm12 = (dm2 * numpy.sqrt(1 + ok * (dm1 / radius)**2) - 
+                    dm1 * numpy.sqrt(1 + ok * (dm2 / radius)**2))
+            self.assertAlmostEqual(mm.da_between(z1, z2) / (dm12 / (1 + z2)), 1, 10)
+            self.assertAlmostEqual(mm.dc_between(z1, z2), mm.dc(z2) - mm.dc(z1), 6)
+            self.assertIsInstance(mm.dc_between(z1, z2), float)
+
+    def test_matrix(self):
+        mm = Flrw(70., 0.3, 0.7)
+        lens = numpy.array([0.2, 0.5, 0.7])
+        res = mm.da_between(lens[:, numpy.newaxis], self.zz)
+        self.assertEqual(res.shape, (3, 5))
+        for i, z1 in enumerate(lens):
+            for j, z2 in enumerate(self.zz):
+                self.assertAlmostEqual(res[i, j], mm.da_between(z1, z2), 8)
+        # flat metric
+        dc = mm.dc(self.zz)
+        self.assertTrue(numpy.allclose(res[1], (dc - mm.dc(0.5)) / (1 + self.zz)))
+    
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(BetweenTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
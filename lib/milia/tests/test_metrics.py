@@ -16,12 +16,31 @@
 # along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import array
+import pickle
 import unittest
 
-from milia import Flrw
+import numpy
+
 from milia.tests import isclose, model
+from milia.tests.common import MetricTests
+from milia import parallel
+
+# the compiled extension, not the active backend
+try:
+    from milia._milia import Flrw, FlrwEnsemble
+except ImportError:
+    Flrw = FlrwEnsemble = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
 
-class FlrwTest(unittest.TestCase):
+@unittest.skipIf(Flrw is None, "the extension milia._milia is not built")
+class FlrwTest(MetricTests, unittest.TestCase):
+
+    Flrw = Flrw
 
     def test_luminosity_distance(self):
         for param, checktup in model['lum']:
@@ -59,6 +78,157 @@ class FlrwTest(unittest.TestCase):
             mm = Flrw(*param)
             for d, z, _tol in checktup:
                 self.assertTrue(isclose(mm.vol(z), d))
+
+    def test_array_input(self):
+        for param, checktup in model['lum']:
+            mm = Flrw(*param)
+            zz = numpy.array([z for _, z, _ in checktup])
+            for method in ['dc', 'dm', 'da', 'dl', 'lt', 'vol', 'age']:
+                fun = getattr(mm, method)
+                res = fun(zz)
+                self.assertIsInstance(res, numpy.ndarray)
+                self.assertEqual(res.shape, zz.shape)
+                for r, z in zip(res, zz):
+                    self.assertTrue(isclose(r, fun(z)))
+                res = fun(zz.reshape(-1, 1))
+                self.assertEqual(res.shape, (len(zz), 1))
+                self.assertIsInstance(fun(list(zz)), numpy.ndarray)
+                self.assertIsInstance(fun(zz[0]), float)
+
+    def test_threads(self):
+        mm = Flrw(*model['lum'][1][0])
+        zz = numpy.linspace(0, 10, 20000)
+        ref = mm.dl(zz, num_threads=1)
+        for nt in [None, 2, 4]:
+            self.assertTrue(numpy.all(mm.dl(zz, num_threads=nt) == ref))
+
+
+    def test_ensemble(self):
+        params = numpy.array([param for param, _ in model['lum']])
+        zz = numpy.array([0.001, 0.1, 1, 10])
+        ens = FlrwEnsemble(params[:, 0], params[:, 1], params[:, 2])
+        self.assertEqual(len(ens), len(params))
+        for method in ['dc', 'dm', 'da', 'dl', 'lt', 'vol', 'age']:
+            res = getattr(ens, method)(zz)
+            self.assertEqual(res.shape, (len(params), len(zz)))
+            for row, param in zip(res, params):
+                mm = Flrw(*param)
+                for r, e in zip(row, getattr(mm, method)(zz)):
+                    self.assertTrue(isclose(r, e))
+        res = ens.evaluate('dl', numpy.linspace(0, 10, 20000))
+        self.assertEqual(res.shape, (len(params), 20000))
+        self.assertRaises(ValueError, ens.evaluate, 'dx', zz)
+        # Broadcasting of parameters
+        ens = FlrwEnsemble(70., [0.3, 0.25], 0.7)
+        self.assertEqual(ens.dl(1.0).shape, (2,))
+
+    def test_c_api(self):
+        import ctypes
+        from milia import _milia
+        api = _milia.c_api()
+        proto = ctypes.CFUNCTYPE(ctypes.c_double, ctypes.c_void_p, ctypes.c_int, 
+                                 ctypes.c_double)
+        flrw_eval = proto(api['flrw_eval'])
+        flrw_nat_eval = proto(api['flrw_nat_eval'])
+        for param, _ in model['lum']:
+            mm = Flrw(*param)
+            nat = _milia.FlrwNat(*param[1:])
+            # the C API does not use the series expansions of the methods
+            for q, code in api['quantities'].items():
+                self.assertTrue(isclose(flrw_eval(mm.handle, code, 1.5), 
+                                        getattr(mm, q)(1.5), 1e-13, 0))
+                self.assertTrue(isclose(flrw_nat_eval(nat.handle, code, 1.5), 
+                                        getattr(nat, q)(1.5), 1e-13, 0))
+
+    def test_series(self):
+        from milia import _milia
+        from milia.impl import distance_series
+        for param in [(0.3, 0.7), (0.3, 0.2), (1.0, 0.0)]:
+            mm = Flrw(70., *param)
+            nat = _milia.FlrwNat(*param)
+            zlow, _, zhigh, _ = distance_series(*param)
+            for z in [zlow, zhigh]:
+                if z > 0:
+                    below, above = nat.dl(z * (1 - 1e-12)), nat.dl(z * (1 + 1e-12))
+                    self.assertAlmostEqual(above / below, 1, 11)
+            zz = numpy.array([1e-4, 0.5 * zlow, 2.0, 1e3])
+            res = mm.evaluate(zz, ('dc', 'dl'))
+            for z, dc, dl in zip(zz, res['dc'], res['dl']):
+                self.assertTrue(isclose(mm.dc(z), dc, 1e-14, 0))
+                self.assertTrue(isclose(mm.dl(z), dl, 1e-14, 0))
+                self.assertTrue(isclose(mm.dl(z), 
+                                        299792.458 / 70 * nat.dl(z), 1e-14, 0))
+        # closed model beyond the equator, the distance is folded 
+        # in every path
+        from milia.factory import FlrwNat
+        nat = _milia.FlrwNat(3.0, 0.1)
+        zhigh = distance_series(3.0, 0.1)[2]
+        zz = numpy.array([2 * zhigh, 50.0, 1e3])
+        res = nat.dc(zz)
+        self.assertTrue(numpy.allclose(res, nat.evaluate(zz, ('dc',))['dc'], 
+                                       rtol=1e-12, atol=0))
+        self.assertTrue(numpy.allclose(res, FlrwNat(3.0, 0.1).dc(zz), 
+                                       rtol=1e-10, atol=0))
+        # the series follow the parameters
+        mm = Flrw(70., 0.3, 0.7)
+        mm.matter = 0.25
+        self.assertTrue(isclose(mm.dl(0.01), Flrw(70., 0.25, 0.7).dl(0.01), 1e-15, 0))
+        self.assertTrue(isclose(mm.dl(1e3), Flrw(70., 0.25, 0.7).dl(1e3), 1e-15, 0))
+
+    def test_pickle(self):
+        for param, _ in model['lum']:
+            mm = Flrw(*param)
+            other = pickle.loads(pickle.dumps(mm))
+            self.assertIsInstance(other, Flrw)
+            self.assertEqual(str(other), str(mm))
+            self.assertEqual(other.dl(1.0), mm.dl(1.0))
+        ens = FlrwEnsemble(70., [0.3, 0.25], 0.7)
+        other = pickle.loads(pickle.dumps(ens))
+        self.assertTrue(numpy.all(other.dl(1.0) == ens.dl(1.0)))
+
+    def test_parallel_map(self):
+        param, _ = model['lum'][0]
+        mm = Flrw(*param)
+        zz = numpy.linspace(0, 10, 1001).reshape(7, 143)
+        res = parallel.map(mm, 'dl', zz, workers=2, chunk_size=100)
+        self.assertEqual(res.shape, zz.shape)
+        self.assertTrue(numpy.all(res == mm.dl(zz)))
+        self.assertRaises(ValueError, parallel.map, mm, 'dx', zz)
+        # one row per metric
+        ens = FlrwEnsemble(70., [0.3, 0.25], 0.7)
+        zz = numpy.linspace(0, 10, 7).reshape(7, 1)
+        res = parallel.map(ens, 'dl', zz, workers=2, chunk_size=3)
+        self.assertEqual(res.shape, (2, 7, 1))
+        self.assertTrue(numpy.all(res == ens.dl(zz)))
+        self.assertEqual(parallel.map(ens, 'dl', [], workers=2).shape, (2, 0))
+
+    def test_buffer_input(self):
+        param, _ = model['lum'][0]
+        mm = Flrw(*param)
+        zz = numpy.linspace(0, 5, 11)
+        ref = mm.dl(zz)
+        table = numpy.zeros(len(zz), dtype=[('id', 'i4'), ('z', 'f4')])
+        table['z'] = zz
+        inputs = [table['z'], numpy.column_stack([zz, zz])[:, 0], array.array('d', zz),
+                  memoryview(zz.tobytes()).cast('d'), zz.astype('>f8')]
+        for z in inputs:
+            res = mm.dl(z)
+            self.assertEqual(res.shape, zz.shape)
+            self.assertTrue(numpy.allclose(res, ref, rtol=1e-6))
+        res = mm.evaluate(table['z'], ('dl',))['dl']
+        self.assertTrue(numpy.allclose(res, ref, rtol=1e-6))
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_pandas_input(self):
+        param, _ = model['lum'][0]
+        mm = Flrw(*param)
+        zz = pandas.Series(numpy.linspace(0, 5, 11), index=range(10, 21))
+        res = mm.dl(zz)
+        self.assertIsInstance(res, pandas.Series)
+        self.assertTrue(res.index.equals(zz.index))
+        self.assertTrue(numpy.all(res.values == mm.dl(zz.values)))
+        res = mm.evaluate(zz, ('dc',))['dc']
+        self.assertTrue(res.index.equals(zz.index))
     
 def test_suite():
     suite = unittest.TestSuite()
@@ -18,10 +18,18 @@
 
 import unittest
 
-from milia import FlrwNat, Flrw
+import numpy
+
 from milia.tests import isclose
 from milia.tests import model_nat as model
 
+# the compiled extension, not the active backend
+try:
+    from milia._milia import FlrwNat, Flrw
+except ImportError:
+    FlrwNat = Flrw = None
+
+@unittest.skipIf(FlrwNat is None, "the extension milia._milia is not built")
 class FlrwNatTest(unittest.TestCase):
 
     def test_luminosity_distance(self):
@@ -60,6 +68,42 @@ class FlrwNatTest(unittest.TestCase):
             mm = FlrwNat(*param)
             for d, z, _tol in checktup:
                 self.assertTrue(isclose(mm.vol(z), d))
+
+    def test_array_input(self):
+        for param, checktup in model['lum']:
+            mm = FlrwNat(*param)
+            zz = numpy.array([z for _, z, _ in checktup])
+            for method in ['dc', 'dm', 'da', 'dl', 'lt', 'vol', 'age']:
+                fun = getattr(mm, method)
+                res = fun(zz)
+                self.assertIsInstance(res, numpy.ndarray)
+                self.assertEqual(res.shape, zz.shape)
+                for r, z in zip(res, zz):
+                    self.assertTrue(isclose(r, fun(z)))
+                res = fun(zz.reshape(-1, 1))
+                self.assertEqual(res.shape, (len(zz), 1))
+                self.assertIsInstance(fun(list(zz)), numpy.ndarray)
+                self.assertIsInstance(fun(zz[0]), float)
+
+    def test_threads(self):
+        mm = FlrwNat(*model['lum'][1][0])
+        zz = numpy.linspace(0, 10, 20000)
+        ref = mm.dl(zz, num_threads=1)
+        for nt in [None, 2, 4]:
+            self.assertTrue(numpy.all(mm.dl(zz, num_threads=nt) == ref))
+
+
+    def test_evaluate(self):
+        quantities = ('dc', 'dm', 'da', 'dl', 'vol')
+        for param, checktup in model['lum']:
+            mm = FlrwNat(*param)
+            zz = numpy.array([z for _, z, _ in checktup])
+            res = mm.evaluate(zz, quantities)
+            self.assertEqual(list(res), list(quantities))
+            for q in quantities:
+                for r, e in zip(res[q], getattr(mm, q)(zz)):
+                    self.assertTrue(isclose(r, e))
+        self.assertRaises(ValueError, mm.evaluate, zz, ('dx',))
     
 def test_suite():
     suite = unittest.TestSuite()
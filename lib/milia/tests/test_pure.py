@@ -16,12 +16,20 @@
 # along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import os
+import subprocess
+import sys
 import unittest
 
+import numpy
+
 from milia.pure import Flrw
 from milia.tests import isclose, model
+from milia.tests.common import MetricTests
+
+class FlrwTest(MetricTests, unittest.TestCase):
 
-class FlrwTest(unittest.TestCase):
+    Flrw = Flrw
 
     def test_luminosity_distance(self):
         for param, checktup in model['lum']:
@@ -47,7 +55,6 @@ class FlrwTest(unittest.TestCase):
             for d, z, _tol in checktup:                
                 self.assertTrue(isclose(mm.dc(z), d))
     
-    @unittest.skip("not implemented yet")
     def test_age(self):
         for param, checktup in model['age']:
             mm = Flrw(*param)
@@ -60,7 +67,30 @@ class FlrwTest(unittest.TestCase):
             mm = Flrw(*param)
             for d, z, _tol in checktup:
                 self.assertTrue(isclose(mm.vol(z), d))
-    
+
+    def test_array_input(self):
+        for param, checktup in model['lum']:
+            mm = Flrw(*param)
+            zz = numpy.array([z for _, z, _ in checktup])
+            for method in ['dc', 'dm', 'da', 'dl', 'vol']:
+                fun = getattr(mm, method)
+                res = fun(zz)
+                self.assertIsInstance(res, numpy.ndarray)
+                self.assertEqual(res.shape, zz.shape)
+                for r, z in zip(res, zz):
+                    self.assertTrue(isclose(r, fun(z)))
+                res = fun(zz.reshape(-1, 1))
+                self.assertEqual(res.shape, (len(zz), 1))
+
+    def test_lazy_import(self):
+        code = ('import sys; import milia.pure; '
+                'milia.pure.Flrw(70, 0.3, 0.0).dl(1.0); '
+                'milia.pure.Flrw(70, 0.3, 0.7).dl(1.0); '
+                'print("scipy" in sys.modules)')
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        self.assertEqual(out.split(), [b'False'])
+
 def test_suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(FlrwTest))
@@ -0,0 +1,58 @@
+#
+# Copyright 2009-2013 Sergio Pascual
+# 
+# This file is part of PyMilia
+# 
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# PyMilia is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with PyMilia.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+import numpy
+
+from milia.pure import Flrw
+from milia.factory import FlrwNat
+from milia.tests import isclose
+
+class FlrwTableTest(unittest.TestCase):
+
+    def test_tolerance(self):
+        for mm in [Flrw(70., 0.3, 0.7), FlrwNat(0.0, 0.5), Flrw(50., 1.0, 0.)]:
+            for rtol in [1e-6, 1e-8]:
+                table = mm.tabulate(0, 10, rtol)
+                self.assertTrue(table.max_rel_error <= rtol)
+                zz = numpy.linspace(0.001, 10, 1001)
+                exact = mm.evaluate(zz, ('dc', 'dm', 'da', 'dl', 'vol'))
+                for method in ['dc', 'dm', 'da', 'dl', 'vol']:
+                    res = getattr(table, method)(zz)
+                    self.assertEqual(res.shape, zz.shape)
+                    for r, e in zip(res, exact[method]):
+                        self.assertTrue(isclose(r, e, rtol=rtol, atol=0))
+
+    def test_out_of_range(self):
+        mm = Flrw(70., 0.3, 0.7)
+        table = mm.tabulate(0.5, 2)
+        zz = numpy.array([0.1, 1.0, 5.0])
+        res = table.dl(zz)
+        self.assertEqual(res[0], mm.dl(0.1))
+        self.assertEqual(res[2], mm.dl(5.0))
+        self.assertIsInstance(table.dl(5.0), float)
+        self.assertRaises(ValueError, mm.tabulate, 2, 1)
+    
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(FlrwTableTest))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='test_suite')
@@ -4,8 +4,11 @@ from setuptools import setup, Extension
 from Cython.Distutils import build_ext
 
 ext1=Extension('milia._milia', ['src/milia.pyx'],
+               include_dirs=['lib'],
                language="c++",
-               libraries=['milia'])
+               libraries=['milia'],
+               extra_compile_args=['-fopenmp'],
+               extra_link_args=['-fopenmp'])
 
 setup(name='pymilia',
       version='1.1.0dev',
@@ -17,8 +20,9 @@ setup(name='pymilia',
       description='Cosmological distances and ages',
       package_dir={'milia': 'lib/milia'},
       packages=['milia', 'milia.tests'],
-      requires=['cython'],
-      install_requires=['cython'],
+      package_data={'milia': ['_milia.pxd']},
+      requires=['cython', 'numpy'],
+      install_requires=['cython', 'numpy'],
       ext_modules=[ext1],
       test_suite="nose.collector",
       tests_require=['nose'],
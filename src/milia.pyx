@@ -1,43 +1,569 @@
+cimport cython
+from cython cimport floating
+from cython.parallel cimport prange
+from libc.math cimport (sqrt, asin, asinh, sin, sinh, fabs, pow, fmin, fmax, 
+        isnan, NAN, INFINITY, M_PI_2)
+cimport openmp
 
-cdef extern from "milia/flrw_nat.h" namespace "milia":
-    cdef cppclass flrw_nat:
-        flrw_nat(double, double) except+
-        double dc(double)
-        double dm(double)
-        double da(double)
-        double dl(double)
-        double lt(double)
-        double vol(double)
-        double age()
-        double age(double)
-        double get_matter()
-        double set_matter(double)
-        double get_vacuum()
-        double set_vacuum(double)
-
-cdef extern from "milia/flrw.h" namespace "milia":
-    cdef cppclass flrw:
-        flrw(double, double, double) except+
-        double dc(double)
-        double dm(double)
-        double da(double)
-        double dl(double)
-        double lt(double)
-        double vol(double)
-        double age()
-        double age(double)
-        double angular_scale(double)
-        double get_hubble()
-        double set_hubble(double)
-
-cdef class FlrwNat:
+import numpy as np
+
+# Codes of the quantities, the values of the enum quantity
+_QUANTITIES = {'dc': DC, 'dm': DM, 'da': DA, 'dl': DL, 'lt': LT, 
+        'vol': VOL, 'age': AGE, 'hubble_function': HUBBLE, 'ddc_dz': DDC,
+        'dvol_dz': DVOL}
+
+# Arrays smaller than this are evaluated serially, the
+# cost of starting the threads is larger than the gain
+cdef Py_ssize_t PARALLEL_MIN_SIZE = 16384
+
+# Types of the arrays of redshifts read without conversion, 
+# and of the arrays that can hold the results
+_FLOAT_TYPES = (np.dtype(np.float64), np.dtype(np.float32))
+
+ctypedef fused zfloat:
+    float
+    double
+
+cdef inline bint _isscalar(object z):
+    return isinstance(z, (float, int)) or np.ndim(z) == 0
+
+cdef object _input(object z):
+    '''Flat view of the redshifts, with their type and strides if possible.'''
+    za = np.asarray(z)
+    if za.dtype not in _FLOAT_TYPES:
+        za = za.astype(np.float64)
+    # a view if possible, a copy otherwise
+    return za.reshape(-1)
+
+cdef object _wrap(object z, object res):
+    '''Give a result the index or the coordinates of the redshifts.'''
+    if hasattr(z, 'dims') and hasattr(z, 'coords'):
+        # xarray
+        wrapped = z.copy(deep=False, data=res)
+        wrapped.name = None
+        return wrapped
+    if hasattr(z, 'index') and hasattr(z, 'iloc'):
+        # pandas
+        if res.ndim == 1:
+            return type(z)(res, index=z.index)
+        return type(z)(res, index=z.index, columns=z.columns)
+    return res
+
+cdef inline double _asinc(double ok, double x) noexcept nogil:
+    cdef double sq
+    if ok > 0:
+        sq = sqrt(ok)
+        return asinh(sq * x) / sq
+    elif ok < 0:
+        sq = sqrt(-ok)
+        return asin(sq * x) / sq
+    return x
+
+cdef inline double _vol(double ok, double dm, double dc) noexcept nogil:
+    '''Comoving volume, natural units, as milia.tabulate.volume.'''
+    cdef double u = ok * dm * dm
+    if fabs(u) < 1e-3:
+        return dm * dm * dm * (1.0 / 3 + u * (-1.0 / 10 + u * (3.0 / 56 + 
+                               u * (-5.0 / 144 + u * 35.0 / 1408))))
+    return (dm * sqrt(1 + u) - dc) / (2 * ok)
+
+cdef inline double _efun(double matter, double vacuum, double z) noexcept nogil:
+    '''The Hubble function E(z) = H(z) / H_0.'''
+    cdef double a = 1 + z
+    return sqrt(a * a * (matter * a + 1 - matter - vacuum) + vacuum)
+
+cdef inline double _nat_diff(flrw_nat *metric, int q, double z) noexcept nogil:
+    '''Differential quantities, in natural units.'''
+    cdef double dm
+    cdef double efun = _efun(metric.get_matter(), metric.get_vacuum(), z)
+    if q == HUBBLE:
+        return efun
+    elif q == DDC:
+        return 1 / efun
+    dm = metric.dm(z)
+    return dm * dm / efun
+
+cdef inline double _nat_eval(flrw_nat *metric, int q, double z) noexcept nogil:
+    if q == DC:
+        return metric.dc(z)
+    elif q == DM:
+        return metric.dm(z)
+    elif q == DA:
+        return metric.da(z)
+    elif q == DL:
+        return metric.dl(z)
+    elif q == LT:
+        return metric.lt(z)
+    elif q == VOL:
+        return metric.vol(z)
+    elif q == AGE:
+        return metric.age(z)
+    elif q == HUBBLE or q == DDC or q == DVOL:
+        return _nat_diff(metric, q, z)
+    return 0.0
+
+cdef inline double _flrw_eval(flrw *metric, int q, double z) noexcept nogil:
+    cdef double radius
+    if q == DC:
+        return metric.dc(z)
+    elif q == DM:
+        return metric.dm(z)
+    elif q == DA:
+        return metric.da(z)
+    elif q == DL:
+        return metric.dl(z)
+    elif q == LT:
+        return metric.lt(z)
+    elif q == VOL:
+        return metric.vol(z)
+    elif q == AGE:
+        return metric.age(z)
+    elif q == ANGSCALE:
+        return metric.angular_scale(z)
+    elif q == HUBBLE:
+        return _nat_diff(<flrw_nat *>metric, q, z)
+    elif q == DDC:
+        return 299792.458 / metric.get_hubble() * _nat_diff(<flrw_nat *>metric, q, z)
+    elif q == DVOL:
+        radius = 299792.458 / metric.get_hubble()
+        return radius * radius * radius * _nat_diff(<flrw_nat *>metric, q, z)
+    return 0.0
+
+# The series are used where their first omitted term is below 
+# this fraction of the sum, as in milia.impl
+cdef double SERIES_TOL = 2.0 ** -55
+
+cdef void _inverse_sqrt(double g1, double g2, double g3, double *f) noexcept nogil:
+    '''Taylor coefficients of 1 / sqrt(1 + g1 x + g2 x**2 + g3 x**3),
+    as milia.impl.inverse_sqrt_series.'''
+    cdef double g[4]
+    cdef double acc
+    cdef int n, k
+    g[0] = 1
+    g[1] = g1
+    g[2] = g2
+    g[3] = g3
+    f[0] = 1
+    for n in range(1, SERIES_ORDER):
+        acc = 0
+        for k in range(1, min(n, 3) + 1):
+            acc -= (n - 0.5 * k) * g[k] * f[n - k]
+        f[n] = acc / n
+
+cdef double _series_limit(const double *f) noexcept nogil:
+    '''As milia.impl.series_limit.'''
+    cdef double limit = INFINITY
+    cdef int n
+    for n in range(SERIES_ORDER - 4, SERIES_ORDER):
+        if f[n] != 0:
+            limit = fmin(limit, pow(SERIES_TOL / fabs(f[n]), 1.0 / n))
+    return limit
+
+cdef void _fill_series(series *s, double matter, double vacuum) noexcept nogil:
+    '''Coefficients and thresholds of the series, as milia.impl.distance_series.
+
+    The distance at infinite redshift is left to be computed when needed.
+    '''
+    cdef double f[SERIES_ORDER]
+    cdef double ok = 1 - matter - vacuum
+    cdef double vmin
+    cdef bint bounce = False
+    cdef int n
+    s.ok = ok
+    _inverse_sqrt(3 * matter + 2 * ok, 3 * matter + ok, matter, f)
+    s.zlow = _series_limit(f)
+    for n in range(SERIES_ORDER):
+        s.low[SERIES_ORDER - 1 - n] = f[n] / (n + 1)
+    s.zhigh = INFINITY
+    s.dc_inf = NAN
+    if matter > 0:
+        if vacuum > 0 and ok < 0:
+            vmin = sqrt(-ok / (3 * vacuum))
+            bounce = vmin < 1 and matter + vmin * (ok + vacuum * vmin * vmin) <= 0
+        if not bounce:
+            _inverse_sqrt(ok / matter, 0.0, vacuum / matter, f)
+            s.zhigh = fmax(1 / _series_limit(f) - 1, 0.0)
+            for n in range(SERIES_ORDER):
+                s.high[SERIES_ORDER - 1 - n] = 2 / sqrt(matter) * f[n] / (2 * n + 1)
+    s.active = True
+
+cdef inline double _horner(const double *coef, double x) noexcept nogil:
+    cdef double res = 0
+    cdef int n
+    for n in range(SERIES_ORDER):
+        res = res * x + coef[n]
+    return res
+
+cdef inline bint _is_distance(int q) noexcept nogil:
+    return q == DC or q == DM or q == DA or q == DL
+
+cdef inline bint _series_eval(series *s, int q, double z, double *res) noexcept nogil:
+    '''Distances from the series expansions, natural units.
+
+    Returns False if the quantity or the redshift are not covered
+    by the series.
+    '''
+    cdef double dc, dm, v, sq
+    if not s.active or not _is_distance(q):
+        return False
+    if fabs(z) <= s.zlow:
+        dc = z * _horner(s.low, z)
+    elif z >= s.zhigh and not isnan(s.dc_inf):
+        v = 1 / (1 + z)
+        dc = s.dc_inf - sqrt(v) * _horner(s.high, v)
+    else:
+        return False
+    if s.ok > 0:
+        sq = sqrt(s.ok)
+        dm = sinh(sq * dc) / sq
+    elif s.ok < 0:
+        sq = sqrt(-s.ok)
+        dm = sin(sq * dc) / sq
+        # folded by the inverse of sin, as in evaluate
+        if sq * dc > M_PI_2:
+            dc = _asinc(s.ok, dm)
+    else:
+        dm = dc
+    if q == DC:
+        res[0] = dc
+    elif q == DM:
+        res[0] = dm
+    elif q == DA:
+        res[0] = dm / (1 + z)
+    else:
+        res[0] = dm * (1 + z)
+    return True
+
+# C API, the handles are the attribute handle of the metrics
+cdef double flrw_eval(void *handle, int q, double z) noexcept nogil:
+    '''Compute one quantity of a Flrw at one redshift.'''
+    return _flrw_eval(<flrw *>handle, q, z)
+
+cdef double flrw_nat_eval(void *handle, int q, double z) noexcept nogil:
+    '''Compute one quantity of a FlrwNat at one redshift.'''
+    return _nat_eval(<flrw_nat *>handle, q, z)
+
+def c_api():
+    '''Return the addresses of the functions of the C API.
+
+    The functions have the C signature
+    double (*)(void *handle, int quantity, double z), they do not
+    need the GIL. handle is the attribute handle of a Flrw, for
+    flrw_eval, or of a FlrwNat, for flrw_nat_eval, and it is valid
+    while the metric exists.
+
+    :returns: a dictionary with the addresses of 'flrw_eval' and 
+              'flrw_nat_eval', and the codes of the quantities in 
+              'quantities'
+
+    '''
+    return {'flrw_eval': <size_t>&flrw_eval, 
+            'flrw_nat_eval': <size_t>&flrw_nat_eval,
+            'quantities': dict(_QUANTITIES)}
+
+cdef int _nthreads(object num_threads, Py_ssize_t n):
+    if n < PARALLEL_MIN_SIZE:
+        return 1
+    if num_threads is None:
+        return openmp.omp_get_max_threads()
+    return max(1, num_threads)
+
+cdef class _FlrwBase:
+    '''Common machinery of the metrics.
+
+    Subclasses implement _eval, that computes one quantity at one redshift.
+    Arrays of redshifts are evaluated in a loop over typed memoryviews,
+    without the GIL, and in parallel with OpenMP for large arrays.
+
+    '''
+    cdef double _eval(self, int q, double z) noexcept nogil:
+        return 0.0
+
+    cdef double _radius(self):
+        return 1.0
+
+    cdef _prepare(self, int q, object z, bint scalar):
+        '''Compute the series needed to evaluate a distance at z.
+
+        The series replace the C++ metric at low and high redshift, 
+        in the methods of the metric, not in the C API. They are computed
+        before the first evaluation of a distance, and again after
+        a change of the parameters. The distance at infinite redshift 
+        is computed the first time that it is needed.
+        '''
+        if not _is_distance(q):
+            return
+        if not self._series.active:
+            _fill_series(&self._series, self.matter, self.vacuum)
+        if self._series.zhigh < INFINITY and isnan(self._series.dc_inf):
+            if scalar:
+                zmax = z
+            elif np.size(z) > 0:
+                zmax = np.max(z)
+            else:
+                return
+            if zmax >= self._series.zhigh:
+                from milia.impl import infinite_distance
+                self._series.dc_inf = infinite_distance(self.matter, self.vacuum)
+
+    cdef double value(self, int q, double z) except? -1 nogil:
+        '''Compute one quantity at one redshift, without the GIL.
+
+        The first distance needs the GIL to compute the series, an
+        error there is raised, with the return value -1.
+        '''
+        if _is_distance(q) and (not self._series.active or 
+                (z >= self._series.zhigh and isnan(self._series.dc_inf))):
+            with gil:
+                self._prepare(q, z, True)
+        return self._eval(q, z)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _evaluate(self, double z, double ok, double radius, bint need_dl,
+            const int[::1] qv, double[:, ::1] rv, Py_ssize_t i) noexcept nogil:
+        cdef double dl = 0, dm = 0, dc = 0, x = 0
+        cdef Py_ssize_t k
+        cdef int q
+        if need_dl:
+            dl = self._eval(DL, z)
+            dm = dl / (1 + z)
+            x = dm / radius
+            dc = radius * _asinc(ok, x)
+        for k in range(qv.shape[0]):
+            q = qv[k]
+            if q == DL:
+                rv[k, i] = dl
+            elif q == DM:
+                rv[k, i] = dm
+            elif q == DA:
+                rv[k, i] = dm / (1 + z)
+            elif q == DC:
+                rv[k, i] = dc
+            elif q == VOL:
+                rv[k, i] = radius * radius * radius * _vol(ok, x, dc / radius)
+            elif q == DVOL:
+                rv[k, i] = dm * dm * self._eval(DDC, z)
+            else:
+                rv[k, i] = self._eval(q, z)
+
+    def evaluate(self, z, quantities=('dc', 'dm', 'da', 'dl', 'vol', 'lt'), 
+            num_threads=None):
+        '''Return several quantities at the same redshifts.
+
+        The luminosity distance is computed once, the other 
+        distances and the volume are derived from it.
+
+        :param z: redshift, scalar or array-like
+        :param quantities: names of the methods to evaluate
+        :param num_threads: number of threads used with large arrays
+        :returns: a dictionary with the values of each quantity
+
+        '''
+        cdef double[:, ::1] rv
+        cdef const int[::1] qv
+        cdef Py_ssize_t n
+        cdef double ok = 1 - self.matter - self.vacuum
+        cdef double radius = self._radius()
+        cdef bint need_dl
+        cdef bint scalar = _isscalar(z)
+        cdef int nt
+
+        try:
+            qv = np.array([_QUANTITIES[q] for q in quantities], dtype=np.intc)
+        except KeyError as err:
+            raise ValueError('unknown quantity %r' % err.args[0])
+        need_dl = any(q in ('dc', 'dm', 'da', 'dl', 'vol', 'dvol_dz') 
+                for q in quantities)
+
+        zf = _input(z)
+        if need_dl:
+            self._prepare(DL, z if scalar else zf, scalar)
+        res = np.empty((qv.shape[0],) + np.shape(z), dtype=np.float64)
+        rv = res.reshape(qv.shape[0], -1)
+        n = zf.shape[0]
+        nt = _nthreads(num_threads, n)
+        if zf.dtype == np.float32:
+            _evaluate_all[float](self, zf, ok, radius, need_dl, qv, rv, nt)
+        else:
+            _evaluate_all[double](self, zf, ok, radius, need_dl, qv, rv, nt)
+        if scalar:
+            return dict((q, float(r)) for q, r in zip(quantities, res.reshape(-1)))
+        return dict((q, _wrap(z, r)) for q, r in zip(quantities, res))
+
+    def tabulate(self, zmin, zmax, rtol=1e-8, cache=None):
+        '''Return interpolation tables of the metric.
+
+        :param zmin: lower redshift of the table
+        :param zmax: upper redshift of the table
+        :param rtol: relative tolerance of the interpolation
+        :param cache: a milia.cache.TableCache, or its directory, where
+                      the tables are stored and read, None to compute them
+        :returns: a FlrwTable, with the same methods as the metric
+
+        '''
+        if cache is not None:
+            from milia.cache import cached_table
+            return cached_table(self, zmin, zmax, rtol, cache)
+        from milia.tabulate import FlrwTable
+        return FlrwTable(self, zmin, zmax, rtol)
+
+    def stream(self, quantities, iterable, chunk_size=65536):
+        '''Evaluate quantities over a stream of redshifts.
+
+        :param quantities: name of a method, or names of several methods
+        :param iterable: iterable of redshifts, scalars or array-like
+        :param chunk_size: number of redshifts of each result
+        :returns: a generator of arrays, or of dictionaries of arrays
+
+        '''
+        from milia.stream import stream
+        return stream(self, quantities, iterable, chunk_size)
+
+    def z_at(self, quantity, values, branch='near', zmax=1e4):
+        '''Return the redshift where a quantity takes some values.
+
+        :param quantity: one of 'dc', 'dm', 'dl', 'da', 'lt', 'age' or 'vol'
+        :param values: values of the quantity, scalar or array-like
+        :param branch: branch of the solution for 'da', 'near' or 'far'
+        :param zmax: maximum redshift of the solutions
+        :returns: redshifts, NaN where the value is not reached
+
+        '''
+        from milia.inverse import z_at
+        return z_at(self, quantity, values, branch, zmax)
+
+    def dc_between(self, z1, z2):
+        '''Return the comoving distance between two redshifts.
+
+        :param z1: redshift of the first object, scalar or array-like
+        :param z2: redshift of the second object, scalar or array-like
+        :returns: comoving distance in the line of sight, with the shape 
+                  of z1 and z2 broadcast
+
+        '''
+        from milia.lensing import dc_between
+        return dc_between(self, z1, z2)
+
+    def da_between(self, z1, z2):
+        '''Return the angular distance of an object at z2 seen from z1.
+
+        :param z1: redshift of the observer, scalar or array-like
+        :param z2: redshift of the object, scalar or array-like
+        :returns: angular distance, with the shape of z1 and z2 broadcast
+
+        '''
+        from milia.lensing import da_between
+        return da_between(self, z1, z2)
+
+    def jacobian(self, quantity, z, rtol=1e-10):
+        '''Return the derivatives of a quantity with respect to the parameters.
+
+        :param quantity: name of the method, 'dc', 'dm', 'da', 'dl', 'vol', 
+                         'lt', 'age', 'hubble_function', 'ddc_dz' or 'dvol_dz'
+        :param z: redshift, scalar or array-like
+        :param rtol: relative tolerance of the quadrature
+        :returns: array with the derivatives with respect to hubble, matter
+                  and vacuum along the first axis, without hubble in 
+                  natural units
+
+        '''
+        from milia.jacobian import jacobian
+        return jacobian(self, quantity, z, rtol)
+
+    cdef object _map(self, int q, object z, object num_threads, 
+            object out=None, object dtype=None):
+        cdef Py_ssize_t n
+        cdef int nt
+        cdef bint scalar = _isscalar(z)
+
+        if scalar and out is None and dtype is None:
+            self._prepare(q, z, True)
+            return self._eval(q, z)
+
+        zf = _input(z)
+        self._prepare(q, zf, False)
+        res = _output(np.shape(z), out, dtype)
+        # a flat view of the result, if it exists without a copy
+        if res.ndim <= 1 or res.flags.c_contiguous:
+            flat = res.reshape(-1)
+        else:
+            flat = np.empty(zf.shape[0], dtype=res.dtype)
+        n = zf.shape[0]
+        nt = _nthreads(num_threads, n)
+        if zf.dtype == np.float32:
+            if flat.dtype == np.float32:
+                _fill[float, float](self, q, zf, flat, nt)
+            else:
+                _fill[float, double](self, q, zf, flat, nt)
+        else:
+            if flat.dtype == np.float32:
+                _fill[double, float](self, q, zf, flat, nt)
+            else:
+                _fill[double, double](self, q, zf, flat, nt)
+        if not np.may_share_memory(flat, res):
+            res[...] = flat.reshape(res.shape)
+        if out is not None:
+            return res
+        if scalar:
+            return res[()]
+        return _wrap(z, res)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _fill(_FlrwBase metric, int q, const zfloat[:] zv, 
+        floating[:] rv, int nt):
+    '''Evaluate a quantity in an output buffer, possibly strided.'''
+    cdef Py_ssize_t i, n = zv.shape[0]
+    if nt > 1:
+        for i in prange(n, nogil=True, num_threads=nt, schedule='static'):
+            rv[i] = <floating>metric._eval(q, zv[i])
+    else:
+        with nogil:
+            for i in range(n):
+                rv[i] = <floating>metric._eval(q, zv[i])
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _evaluate_all(_FlrwBase metric, const zfloat[:] zv, double ok, 
+        double radius, bint need_dl, const int[::1] qv, double[:, ::1] rv, 
+        int nt):
+    '''Evaluate several quantities, sharing the luminosity distance.'''
+    cdef Py_ssize_t i, n = zv.shape[0]
+    if nt > 1:
+        for i in prange(n, nogil=True, num_threads=nt, schedule='static'):
+            metric._evaluate(zv[i], ok, radius, need_dl, qv, rv, i)
+    else:
+        with nogil:
+            for i in range(n):
+                metric._evaluate(zv[i], ok, radius, need_dl, qv, rv, i)
+
+cdef object _output(object shape, object out, object dtype):
+    '''Check or allocate the array that holds a result.'''
+    if out is None:
+        dtype = np.dtype(np.float64 if dtype is None else dtype)
+        if dtype not in _FLOAT_TYPES:
+            raise ValueError('dtype must be float64 or float32')
+        return np.empty(shape, dtype=dtype)
+    if not isinstance(out, np.ndarray):
+        raise TypeError('out must be a numpy array')
+    if out.dtype not in _FLOAT_TYPES:
+        raise ValueError('out must have type float64 or float32')
+    if dtype is not None and np.dtype(dtype) != out.dtype:
+        raise ValueError('dtype and the type of out are different')
+    if out.shape != shape:
+        raise ValueError('out has shape %s, expected %s' % (out.shape, shape))
+    if not out.flags.writeable:
+        raise ValueError('out is read-only')
+    return out
+
+cdef class FlrwNat(_FlrwBase):
     '''The Friedmann-Lemaitre-Robertson-Walker metric in natural units.
 
     This class represents a FLRW metric in natural units. Its methods 
     compute the common cosmological distances and times.
 
     '''
-    cdef flrw_nat *thisptr
     def __cinit__(self, double matter, double vacuum):
         '''The constructor takes two parameters:
 
@@ -50,90 +576,164 @@ cdef class FlrwNat:
     def __dealloc__(self):
         del self.thisptr
 
-    def age(self, z=None):
+    cdef double _eval(self, int q, double z) noexcept nogil:
+        cdef double res
+        if _series_eval(&self._series, q, z, &res):
+            return res
+        return _nat_eval(self.thisptr, q, z)
+
+    def age(self, z=None, num_threads=None, out=None, dtype=None):
         '''Return the age of the Universe [adimensional].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: age of the Universe [adimensional].
 
         '''
         if z is not None:
-            return self.thisptr.age(z)
+            return self._map(AGE, z, num_threads, out, dtype)
         else:
             return self.thisptr.age()
 
-    def dc(self, z):
+    def dc(self, z, num_threads=None, out=None, dtype=None):
         '''Return the comoving distance in the line of sight [adimensional].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving distance in the line of sight [adimensional]
         
         '''
-        return self.thisptr.dc(z)
+        return self._map(DC, z, num_threads, out, dtype)
         
-    def dl(self, z):
+    def dl(self, z, num_threads=None, out=None, dtype=None):
         '''Return the luminosity distance [adimensional].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: luminosity distance [adimensional]
 
         '''
-        return self.thisptr.dl(z)
+        return self._map(DL, z, num_threads, out, dtype)
 
-    def dm(self, z):
+    def dm(self, z, num_threads=None, out=None, dtype=None):
         '''Return the comoving distance in transverse direction [adimensional].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving distance in transverse direction [adimensional]
         
         '''
-        return self.thisptr.dm(z)
+        return self._map(DM, z, num_threads, out, dtype)
 
-    def da(self, z):
+    def da(self, z, num_threads=None, out=None, dtype=None):
         '''Return the angular distance [adimensional].
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: angular distance [adimensional]
         
         '''
-        return self.thisptr.da(z)
+        return self._map(DA, z, num_threads, out, dtype)
 
-    def lt(self, z):
+    def lt(self, z, num_threads=None, out=None, dtype=None):
         '''Return the look-back time [adimensional].
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: look-back time in [adimensional]
         
         '''
-        return self.thisptr.lt(z)
+        return self._map(LT, z, num_threads, out, dtype)
 
-    def vol(self, z):
+    def vol(self, z, num_threads=None, out=None, dtype=None):
         '''Return comoving volume per solid angle [adimensional].
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving volume per solid angle [adimensional]
         
         '''
-        return self.thisptr.vol(z)
+        return self._map(VOL, z, num_threads, out, dtype)
+
+    def hubble_function(self, z, num_threads=None, out=None, dtype=None):
+        '''Return the Hubble function E(z) = H(z) / H_0 [adimensional].
+        
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: Hubble function [adimensional]
+        
+        '''
+        return self._map(HUBBLE, z, num_threads, out, dtype)
+
+    def ddc_dz(self, z, num_threads=None, out=None, dtype=None):
+        '''Return the derivative of the comoving distance [adimensional].
+        
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: derivative of the comoving distance with redshift [adimensional]
+        
+        '''
+        return self._map(DDC, z, num_threads, out, dtype)
+
+    def dvol_dz(self, z, num_threads=None, out=None, dtype=None):
+        '''Return differential comoving volume per solid angle [adimensional].
+        
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: derivative of the comoving volume per solid angle with 
+                  redshift [adimensional]
+        
+        '''
+        return self._map(DVOL, z, num_threads, out, dtype)
+
+    property handle:
+        '''Address of the C++ metric, for the C API.'''
+        def __get__(self): return <size_t>self.thisptr
 
     property matter:
         def __get__(self): return self.thisptr.get_matter()
-        def __set__(self, m): self.thisptr.set_matter(m)
+        def __set__(self, m):
+            self.thisptr.set_matter(m)
+            self._series.active = False
 
     property vacuum:
         def __get__(self): return self.thisptr.get_vacuum()
-        def __set__(self, m): self.thisptr.set_vacuum(m)
+        def __set__(self, m):
+            self.thisptr.set_vacuum(m)
+            self._series.active = False
 
     def __str__(self):
         return 'milia.FlrwNat(matter=%f, vacuum=%f)' % (self.matter, self.vacuum)
 
-cdef class Flrw:
+    def __reduce__(self):
+        return (FlrwNat, (self.matter, self.vacuum))
+
+cdef class Flrw(_FlrwBase):
     '''The Friedmann-Lemaitre-Robertson-Walker metric
 
     This class represents a FLRW metric. Its methods compute the
     common cosmological distances and times.
     '''
-    cdef flrw *thisptr
     def __cinit__(self, double hubble, double matter, double vacuum):
         '''The constructor takes three parameters:
 
@@ -148,92 +748,365 @@ cdef class Flrw:
     def __dealloc__(self):
         del self.thisptr
 
-    def age(self, z=None):
+    cdef double _eval(self, int q, double z) noexcept nogil:
+        cdef double res
+        if _series_eval(&self._series, q, z, &res):
+            return 299792.458 / self.thisptr.get_hubble() * res
+        return _flrw_eval(self.thisptr, q, z)
+
+    cdef double _radius(self):
+        return 299792.458 / self.thisptr.get_hubble()
+
+    def age(self, z=None, num_threads=None, out=None, dtype=None):
         '''Return the age of the Universe [Gyr].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: age of the Universe [Gyr].
 
         '''
         if z is not None:
-            return self.thisptr.age(z)
+            return self._map(AGE, z, num_threads, out, dtype)
         else:
             return self.thisptr.age()
 
-    def angular_scale(self, z):
+    def angular_scale(self, z, num_threads=None, out=None, dtype=None):
         '''Return the factor to transform angular sizes in pc to arc sec.
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: factor to transform angular sizes in pc to arc sec
 
         '''
-        return self.thisptr.angular_scale(z)
+        return self._map(ANGSCALE, z, num_threads, out, dtype)
 
-    def dc(self, z):
+    def dc(self, z, num_threads=None, out=None, dtype=None):
         '''Return the comoving distance in the line of sight [Mpc].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving distance in the line of sight [Mpc]
         
         '''
-        return self.thisptr.dc(z)
+        return self._map(DC, z, num_threads, out, dtype)
         
-    def dl(self, z):
+    def dl(self, z, num_threads=None, out=None, dtype=None):
         '''Return the luminosity distance [Mpc].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: luminosity distance [Mpc]
 
         '''
-        return self.thisptr.dl(z)
+        return self._map(DL, z, num_threads, out, dtype)
 
-    def dm(self, z):
+    def dm(self, z, num_threads=None, out=None, dtype=None):
         '''Return the comoving distance in transverse direction [Mpc].
 
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving distance in transverse direction [Mpc]
         
         '''
-        return self.thisptr.dm(z)
+        return self._map(DM, z, num_threads, out, dtype)
 
-    def da(self, z):
+    def da(self, z, num_threads=None, out=None, dtype=None):
         '''Return the angular distance [Mpc].
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: angular distance [Mpc] 
         
         '''
-        return self.thisptr.da(z)
+        return self._map(DA, z, num_threads, out, dtype)
 
-    def lt(self, z):
+    def lt(self, z, num_threads=None, out=None, dtype=None):
         '''Return the look-back time [Gyr].
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: look-back time [Gyr]
         
         '''
-        return self.thisptr.lt(z)
+        return self._map(LT, z, num_threads, out, dtype)
 
-    def vol(self, z):
+    def vol(self, z, num_threads=None, out=None, dtype=None):
         '''Return comoving volume per solid angle [Mpc^3 sr^-1]
         
-        :param z: redshift
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
         :returns: comoving volume per solid angle [Mpc^3 sr^-1]
         
         '''
-        return self.thisptr.vol(z)
+        return self._map(VOL, z, num_threads, out, dtype)
+
+    def hubble_function(self, z, num_threads=None, out=None, dtype=None):
+        '''Return the Hubble function E(z) = H(z) / H_0 [adimensional].
+        
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: Hubble function [adimensional]
+        
+        '''
+        return self._map(HUBBLE, z, num_threads, out, dtype)
+
+    def ddc_dz(self, z, num_threads=None, out=None, dtype=None):
+        '''Return the derivative of the comoving distance [Mpc].
+        
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: derivative of the comoving distance with redshift [Mpc]
+        
+        '''
+        return self._map(DDC, z, num_threads, out, dtype)
+
+    def dvol_dz(self, z, num_threads=None, out=None, dtype=None):
+        '''Return differential comoving volume per solid angle [Mpc^3 sr^-1].
+        
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :param out: array where the result is stored, of the shape of z
+        :param dtype: type of the result, float64 or float32
+        :returns: derivative of the comoving volume per solid angle with 
+                  redshift [Mpc^3 sr^-1]
+        
+        '''
+        return self._map(DVOL, z, num_threads, out, dtype)
 
     def __str__(self):
         return 'milia.Flrw(hubble=%f, matter=%f, vacuum=%f)' % (self.hubble, self.matter, self.vacuum)
 
+    def __reduce__(self):
+        return (Flrw, (self.hubble, self.matter, self.vacuum))
+
+    property handle:
+        '''Address of the C++ metric, for the C API.'''
+        def __get__(self): return <size_t>self.thisptr
+
     property matter:
         def __get__(self): return (<flrw_nat *>(self.thisptr)).get_matter()
-        def __set__(self, m): (<flrw_nat *>(self.thisptr)).set_matter(m)
+        def __set__(self, m):
+            (<flrw_nat *>(self.thisptr)).set_matter(m)
+            self._series.active = False
 
     property vacuum:
         def __get__(self): return (<flrw_nat *>(self.thisptr)).get_vacuum()
-        def __set__(self, m): (<flrw_nat *>(self.thisptr)).set_vacuum(m)
+        def __set__(self, m):
+            (<flrw_nat *>(self.thisptr)).set_vacuum(m)
+            self._series.active = False
 
     property hubble:
         def __get__(self): return self.thisptr.get_hubble()
         def __set__(self, m): self.thisptr.set_hubble(m)
+
+cdef class FlrwEnsemble:
+    '''A set of Friedmann-Lemaitre-Robertson-Walker metrics.
+
+    The metrics are evaluated together, each method returns 
+    an array with one row per metric and one column per redshift.
+
+    '''
+    def __cinit__(self, hubble, matter, vacuum):
+        '''The constructor takes three parameters:
+
+        :param hubble: Hubble parameters in km / s / Mpc, array-like
+        :param matter: mater densities (adimensional), array-like
+        :param vacuum: vacuum energy densities (adimensional), array-like
+
+        '''
+        cdef Py_ssize_t k
+        hubble, matter, vacuum = np.broadcast_arrays(
+                np.asarray(hubble, dtype=np.float64),
+                np.asarray(matter, dtype=np.float64),
+                np.asarray(vacuum, dtype=np.float64))
+        self.hubble = hubble.flatten()
+        self.matter = matter.flatten()
+        self.vacuum = vacuum.flatten()
+        for k in range(self.hubble.shape[0]):
+            self.metrics.push_back(new flrw(self.hubble[k], self.matter[k], 
+                self.vacuum[k]))
+
+    def __dealloc__(self):
+        cdef size_t k
+        for k in range(self.metrics.size()):
+            del self.metrics[k]
+
+    def __len__(self):
+        return self.metrics.size()
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef object _map(self, int q, object z, object num_threads):
+        cdef Py_ssize_t nk = self.metrics.size()
+        cdef int nt
+
+        zf = _input(z)
+        res = np.empty((nk,) + np.shape(z), dtype=np.float64)
+        nt = _nthreads(num_threads, nk * zf.shape[0])
+        if zf.dtype == np.float32:
+            _fill_ensemble[float](self.metrics, q, zf, res.reshape(nk, -1), nt)
+        else:
+            _fill_ensemble[double](self.metrics, q, zf, res.reshape(nk, -1), nt)
+        return res
+
+    def evaluate(self, quantity, z, num_threads=None):
+        '''Return a quantity of every metric at the same redshifts.
+
+        :param quantity: name of the method to evaluate
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: array with one row per metric
+
+        '''
+        try:
+            q = _QUANTITIES[quantity]
+        except KeyError:
+            raise ValueError('unknown quantity %r' % quantity)
+        return self._map(q, z, num_threads)
+
+    def age(self, z=None, num_threads=None):
+        '''Return the age of the Universe [Gyr].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: age of the Universe [Gyr].
+
+        '''
+        if z is None:
+            z = 0.0
+        return self._map(AGE, z, num_threads)
+
+    def dc(self, z, num_threads=None):
+        '''Return the comoving distance in the line of sight [Mpc].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: comoving distance in the line of sight [Mpc]
+
+        '''
+        return self._map(DC, z, num_threads)
+
+    def dl(self, z, num_threads=None):
+        '''Return the luminosity distance [Mpc].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: luminosity distance [Mpc]
+
+        '''
+        return self._map(DL, z, num_threads)
+
+    def dm(self, z, num_threads=None):
+        '''Return the comoving distance in transverse direction [Mpc].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: comoving distance in transverse direction [Mpc]
+
+        '''
+        return self._map(DM, z, num_threads)
+
+    def da(self, z, num_threads=None):
+        '''Return the angular distance [Mpc].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: angular distance [Mpc]
+
+        '''
+        return self._map(DA, z, num_threads)
+
+    def lt(self, z, num_threads=None):
+        '''Return the look-back time [Gyr].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: look-back time [Gyr]
+
+        '''
+        return self._map(LT, z, num_threads)
+
+    def vol(self, z, num_threads=None):
+        '''Return comoving volume per solid angle [Mpc^3 sr^-1]
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: comoving volume per solid angle [Mpc^3 sr^-1]
+
+        '''
+        return self._map(VOL, z, num_threads)
+
+    def hubble_function(self, z, num_threads=None):
+        '''Return the Hubble function E(z) = H(z) / H_0 [adimensional].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: Hubble function [adimensional]
+
+        '''
+        return self._map(HUBBLE, z, num_threads)
+
+    def ddc_dz(self, z, num_threads=None):
+        '''Return the derivative of the comoving distance [Mpc].
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: derivative of the comoving distance with redshift [Mpc]
+
+        '''
+        return self._map(DDC, z, num_threads)
+
+    def dvol_dz(self, z, num_threads=None):
+        '''Return differential comoving volume per solid angle [Mpc^3 sr^-1]
+
+        :param z: redshift, scalar or array-like
+        :param num_threads: number of threads used with large arrays
+        :returns: derivative of the comoving volume per solid angle with 
+                  redshift [Mpc^3 sr^-1]
+
+        '''
+        return self._map(DVOL, z, num_threads)
+
+    def __str__(self):
+        return 'milia.FlrwEnsemble(%d metrics)' % len(self)
+
+    def __reduce__(self):
+        return (FlrwEnsemble, (self.hubble, self.matter, self.vacuum))
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _fill_ensemble(vector[flrw *] &metrics, int q, const zfloat[:] zv, 
+        double[:, ::1] rv, int nt):
+    '''Evaluate a quantity of every metric, one row per metric.'''
+    cdef Py_ssize_t i, n = zv.shape[0]
+    cdef Py_ssize_t nk = metrics.size()
+    if n == 0:
+        return
+    if nt > 1:
+        for i in prange(nk * n, nogil=True, num_threads=nt, schedule='static'):
+            rv[i // n, i % n] = _flrw_eval(metrics[i // n], q, zv[i % n])
+    else:
+        with nogil:
+            for i in range(nk * n):
+                rv[i // n, i % n] = _flrw_eval(metrics[i // n], q, zv[i % n])